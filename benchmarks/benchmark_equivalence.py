@@ -0,0 +1,144 @@
+import sys
+import os
+import time
+import shutil
+import tempfile
+import numpy as np
+# Add the parent directory to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scoliomorph.analysis import calculate_vbc_profile, list_stl_files
+from scoliomorph.batch import calculate_cohort_profiles
+from scoliomorph.cache import OrientationCache
+from scoliomorph.incremental import IncrementalProfile
+from scoliomorph.pipeline import calculate_vbc_profile_pipelined
+from scoliomorph.profiling import synthetic_vertebra, write_synthetic_spine
+from scoliomorph.validation import validate_spine, rejected_files
+from scoliomorph import cli
+
+# Regression check of the equivalences the alternative processing paths promise, on the
+# bundled vertebrae. Exits non-zero if any of them does not hold.
+stl_dir = os.path.join(os.path.dirname(__file__), '..', 'stl')
+# Paths that sum in a different order than the eager one agree to these tolerances. The eager
+# 'points' centroid is a float32 mean of up to ~10^5 coordinates, so it is only good to ~1e-2 mm.
+angle_tolerance = 1e-5  # degrees
+centroid_tolerance = 2e-2  # mm
+workdir = tempfile.mkdtemp(prefix="scoliomorph_check_")
+failures = []
+
+
+def check(name, passed, detail=""):
+    print(f"{'ok  ' if passed else 'FAIL'} {name}{': ' + detail if detail else ''}")
+    if not passed:
+        failures.append(name)
+
+
+def identical(profile, reference):
+    """True if two profiles have bit-identical angles, centroids and axes."""
+    return (list(profile.filenames) == list(reference.filenames)
+            and all(np.array_equal(getattr(profile, name), getattr(reference, name))
+                    for name in ("pitch", "roll", "yaw", "centroids", "axes")))
+
+
+def close(name, profile, reference):
+    """Check that two profiles agree to `angle_tolerance` and `centroid_tolerance`."""
+    angle_error = np.abs(profile.angles - reference.angles).max()
+    centroid_error = np.abs(profile.centroids - reference.centroids).max()
+    check(name, list(profile.filenames) == list(reference.filenames)
+          and angle_error <= angle_tolerance and centroid_error <= centroid_tolerance,
+          f"angles {angle_error:.3g}°, centroids {centroid_error:.3g} mm")
+
+
+try:
+    serial = {(mode, method): calculate_vbc_profile(stl_dir, mode=mode, method=method)
+              for mode, method in (("soup", "points"), ("unique", "points"), ("soup", "area"), ("soup", "volume"))}
+
+    # user-001: the cohort engine returns exactly the serial result, in and out of process
+    for n_jobs in (1, 2):
+        for (mode, method), reference in serial.items():
+            (_, profile), = calculate_cohort_profiles([stl_dir], n_jobs=n_jobs, mode=mode, method=method)
+            check(f"batch n_jobs={n_jobs} {mode}/{method} identical to serial", identical(profile, reference))
+
+    # user-004: streaming matches the eager path to floating-point tolerance
+    for method in ("points", "area", "volume"):
+        for chunk_size in (1000, 4096):
+            close(f"streaming {method} chunk_size={chunk_size} matches eager",
+                  calculate_vbc_profile(stl_dir, method=method, chunk_size=chunk_size), serial[("soup", method)])
+
+    # user-005: cache hits return what was computed on the miss
+    with OrientationCache(os.path.join(workdir, "cache.sqlite")) as cache:
+        missed = calculate_vbc_profile(stl_dir, cache=cache)
+        hit = calculate_vbc_profile(stl_dir, cache=cache)
+        check("cache miss identical to uncached", identical(missed, serial[("soup", "points")]))
+        check("cache hit identical to miss", identical(hit, missed) and cache.hits == len(hit))
+
+    # user-021: every processing path drops the same loose fragments with component='largest'
+    largest = calculate_vbc_profile(stl_dir, component='largest')
+    check("component='largest' changes the fragmented levels", not identical(largest, serial[("soup", "points")]))
+    (_, profile), = calculate_cohort_profiles([stl_dir], n_jobs=2, component='largest')
+    check("batch component='largest' identical to serial", identical(profile, largest))
+    check("pipelined component='largest' identical to serial",
+          identical(calculate_vbc_profile_pipelined(stl_dir, component='largest'), largest))
+    check("incremental component='largest' identical to serial",
+          identical(IncrementalProfile(stl_dir, component='largest').profile, largest))
+
+    # user-021: a spine with a loose fragment holding ~8% of one file's faces is rejected by
+    # --validate, but kept with --validate --component largest, which gives the clean result
+    from stl import mesh
+    clean_dir = os.path.join(workdir, "clean")
+    fragmented_dir = os.path.join(workdir, "fragmented")
+    write_synthetic_spine(clean_dir, n_levels=3, n_faces=4000)
+    write_synthetic_spine(fragmented_dir, n_levels=3, n_faces=4000)
+    fragmented_path = os.path.join(fragmented_dir, list_stl_files(fragmented_dir)[1])
+    stl_mesh = mesh.Mesh.from_file(fragmented_path)
+    fragment = synthetic_vertebra(350, radii=(6.0, 5.0, 4.0), center=stl_mesh.vectors.reshape(-1, 3).mean(axis=0) + 40)
+    combined = mesh.Mesh(np.zeros(len(stl_mesh.vectors) + len(fragment), dtype=mesh.Mesh.dtype))
+    combined.vectors[:] = np.concatenate([stl_mesh.vectors, fragment])
+    combined.save(fragmented_path)
+    share = validate_spine(fragmented_dir)[os.path.basename(fragmented_path)]["metrics"]["largest_component_fraction"]
+    check("fragmented file rejected by default thresholds", rejected_files(validate_spine(fragmented_dir)) != [],
+          f"largest component {100 * share:.1f}% of the faces")
+    check("fragmented file accepted without the fragment check",
+          rejected_files(validate_spine(fragmented_dir, min_largest_component_fraction=None)) == [])
+    check("component='largest' on the fragmented spine identical to the clean spine",
+          all(np.array_equal(getattr(calculate_vbc_profile(fragmented_dir, component='largest'), name),
+                             getattr(calculate_vbc_profile(clean_dir), name))
+              for name in ("pitch", "roll", "yaw", "centroids", "axes")))
+    output = os.path.join(workdir, "fragmented.csv")
+    cli.main([fragmented_dir, "--validate", "--component", "largest", "--no-progress", "-o", output])
+    with open(output) as f:
+        rows = f.read().splitlines()[1:]
+    check("--validate --component largest keeps the fragmented spine", len(rows) == 3, f"{len(rows)} rows")
+    try:
+        cli.main([fragmented_dir, "--validate", "--no-progress", "-o", output])
+        rejected_exit = None
+    except SystemExit as error:
+        rejected_exit = error.code
+    check("--validate alone rejects the fragmented spine with an error", bool(rejected_exit), str(rejected_exit))
+
+    # user-012: a patched incremental profile equals a rebuild. L2 (yaw about -81°) is turned
+    # by 15° about Z so that its yaw wraps past -90°, as do both level pairs it belongs to.
+    spine_dir = shutil.copytree(stl_dir, os.path.join(workdir, "spine"))
+    incremental = IncrementalProfile(spine_dir)
+    filepath = os.path.join(spine_dir, incremental.filenames[1])
+    stl_mesh = mesh.Mesh.from_file(filepath)
+    angle = np.radians(15)
+    stl_mesh.rotate_using_matrix(np.array([[np.cos(angle), -np.sin(angle), 0], [np.sin(angle), np.cos(angle), 0],
+                                           [0, 0, 1]]))
+    time.sleep(0.01)  # make sure the modification time changes
+    stl_mesh.save(filepath)
+    changes = incremental.refresh()
+    rebuilt = IncrementalProfile(spine_dir)
+    check("incremental refresh patched the modified level", changes["modified"] == [incremental.filenames[1]],
+          str(changes))
+    check("incremental yaw of the modified level crossed ±90°", incremental.profile.yaw[1] > 0,
+          f"{serial[('soup', 'points')].yaw[1]:.2f}° -> {incremental.profile.yaw[1]:.2f}°")
+    check("incremental delta_angles wrapped to [-90°, 90°]", np.abs(incremental.delta_angles).max() <= 90)
+    check("incremental patch identical to rebuild",
+          identical(incremental.profile, rebuilt.profile)
+          and all(np.array_equal(getattr(incremental, name), getattr(rebuilt, name))
+                  for name in ("delta_angles", "offsets", "cumulative_shift")))
+finally:
+    shutil.rmtree(workdir, ignore_errors=True)
+
+print(f"\n{len(failures)} check(s) failed" if failures else "\nAll checks passed")
+sys.exit(1 if failures else 0)
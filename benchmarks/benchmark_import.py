@@ -0,0 +1,42 @@
+import sys
+import os
+import subprocess
+import numpy as np
+
+# Import cost of the compute core, as paid by every short-lived worker process.
+# Each module is imported in a fresh interpreter; the script fails if a heavy plotting
+# dependency is pulled in, or with --max-ms if the median import time exceeds the limit.
+root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+repeats = 10
+heavy = ('matplotlib', 'trimesh')
+modules = ('scoliomorph', 'scoliomorph.analysis', 'scoliomorph.batch', 'scoliomorph.cli', 'scoliomorph.plotting')
+
+probe = """
+import sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(elapsed, ','.join(name for name in {heavy!r} if name in sys.modules))
+"""
+
+max_ms = float(sys.argv[sys.argv.index('--max-ms') + 1]) if '--max-ms' in sys.argv else None
+failed = False
+for module in modules:
+    times = []
+    for _ in range(repeats):
+        output = subprocess.run([sys.executable, '-c', probe.format(module=module, heavy=heavy)], cwd=root,
+                                capture_output=True, text=True, check=True).stdout.split()
+        times.append(float(output[0]) * 1000)
+        loaded = output[1] if len(output) > 1 else ''
+    median = float(np.median(times))
+    print(f"{module:>22}: {median:7.1f} ms median, {min(times):7.1f} ms min, heavy imports: {loaded or 'none'}")
+
+    compute_only = module != 'scoliomorph.plotting'
+    if compute_only and loaded:
+        print(f"  FAIL: {module} imports {loaded}")
+        failed = True
+    if compute_only and max_ms is not None and median > max_ms:
+        print(f"  FAIL: {module} takes longer than {max_ms:.0f} ms")
+        failed = True
+
+sys.exit(1 if failed else 0)
@@ -0,0 +1,41 @@
+import sys
+import os
+import time
+import tracemalloc
+import numpy as np
+# Add the parent directory to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scoliomorph.analysis import list_stl_files, load_stl_triangles, calculate_principal_axes
+from scoliomorph.moments import calculate_principal_axes_from_mesh
+
+# Compare the point cloud covariance backend with the closed-form mesh moments
+# on the bundled vertebrae. Only the orientation step is measured, not the file parsing.
+stl_dir = os.path.join(os.path.dirname(__file__), '..', 'stl')
+repeats = 5
+
+backends = {
+    'points': lambda triangles: calculate_principal_axes(triangles.reshape(-1, 3)),
+    'area': lambda triangles: calculate_principal_axes_from_mesh(triangles, 'area'),
+    'volume': lambda triangles: calculate_principal_axes_from_mesh(triangles, 'volume'),
+}
+
+meshes = [load_stl_triangles(os.path.join(stl_dir, filename)) for filename in list_stl_files(stl_dir)]
+print(f"{len(meshes)} vertebrae, {sum(len(t) for t in meshes)} triangles in total\n")
+
+for name, backend in backends.items():
+    # Wall time
+    start = time.perf_counter()
+    for _ in range(repeats):
+        angles = [backend(triangles)[:3] for triangles in meshes]
+    elapsed = (time.perf_counter() - start) / repeats
+
+    # Peak memory of the largest vertebra
+    largest = max(meshes, key=len)
+    tracemalloc.start()
+    backend(largest)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    mean_angles = np.mean(np.abs(angles), axis=0)
+    print(f"{name:>7}: {elapsed * 1000:8.2f} ms per spine, peak {peak / 2**20:6.2f} MiB per vertebra, "
+          f"mean |pitch|, |roll|, |yaw| = {mean_angles[0]:.2f}°, {mean_angles[1]:.2f}°, {mean_angles[2]:.2f}°")
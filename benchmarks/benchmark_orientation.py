@@ -0,0 +1,75 @@
+import sys
+import os
+import json
+import time
+import numpy as np
+# Add the parent directory to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scoliomorph.analysis import (list_stl_files, load_stl_file, calculate_principal_axes,
+                                  principal_axes_from_covariances)
+
+# Regression and speed check of the orientation path on the bundled vertebrae.
+# Run with --update to rewrite the reference angles after an intended change.
+stl_dir = os.path.join(os.path.dirname(__file__), '..', 'stl')
+reference_path = os.path.join(os.path.dirname(__file__), 'reference_angles.json')
+tolerance = 1e-9  # degrees; LAPACK builds may differ in the last bits across platforms
+repeats = 2000
+
+filenames = list_stl_files(stl_dir)
+points = [load_stl_file(os.path.join(stl_dir, filename)) for filename in filenames]
+
+
+def run():
+    """Return the (N, 3) pitch, roll, yaw and (N, 3, 3) axes of all bundled vertebrae."""
+    results = [calculate_principal_axes(p) for p in points]
+    angles = np.array([result[:3] for result in results])
+    axes = np.array([result[5] for result in results])
+    return angles, axes
+
+
+# Bit-stability: repeated runs in the same process must agree exactly
+angles, axes = run()
+angles_again, axes_again = run()
+stable = np.array_equal(angles, angles_again) and np.array_equal(axes, axes_again)
+right_handed = np.allclose(np.linalg.det(axes), 1)
+print(f"Repeated runs bit-identical: {stable}")
+print(f"All axes right-handed: {right_handed}")
+
+if '--update' in sys.argv:
+    with open(reference_path, 'w') as f:
+        json.dump({name: list(row) for name, row in zip(filenames, angles.tolist())}, f, indent=2)
+    print(f"Reference angles written to {reference_path}")
+    matches = True
+else:
+    with open(reference_path) as f:
+        reference = json.load(f)
+    expected = np.array([reference[name] for name in filenames])
+    deviation = np.abs(angles - expected).max()
+    matches = deviation <= tolerance
+    print(f"Max deviation from reference angles: {deviation:.3g}° (tolerance {tolerance:g}°)")
+
+# Speed of the eigen-decomposition alone, general versus symmetric solver
+cov_matrices = np.array([np.cov((p - p.mean(axis=0)).T) for p in points])
+
+start = time.perf_counter()
+for _ in range(repeats // len(cov_matrices)):
+    for cov_matrix in cov_matrices:
+        np.linalg.eig(cov_matrix)
+eig_time = (time.perf_counter() - start) / repeats
+
+start = time.perf_counter()
+for _ in range(repeats // len(cov_matrices)):
+    for cov_matrix in cov_matrices:
+        np.linalg.eigh(cov_matrix)
+eigh_time = (time.perf_counter() - start) / repeats
+
+stack = np.repeat(cov_matrices, repeats // len(cov_matrices), axis=0)
+start = time.perf_counter()
+principal_axes_from_covariances(stack)
+batched_time = (time.perf_counter() - start) / len(stack)
+
+print(f"eig:          {eig_time * 1e6:7.2f} µs per vertebra")
+print(f"eigh:         {eigh_time * 1e6:7.2f} µs per vertebra ({eig_time / eigh_time:.1f}x)")
+print(f"batched eigh: {batched_time * 1e6:7.2f} µs per vertebra incl. angles ({eig_time / batched_time:.1f}x)")
+
+sys.exit(0 if stable and right_handed and matches else 1)
@@ -0,0 +1,96 @@
+import sys
+import os
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import numpy as np
+# Add the parent directory to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scoliomorph.analysis import list_stl_files, load_stl_triangles
+from scoliomorph.profiling import StageProfiler, profile_vbc_profile, write_synthetic_spine
+
+# Per-stage benchmark of calculate_vbc_profile on the bundled vertebrae and on synthetic
+# spines of increasing resolution. Wall times are the best of --repeats runs without any
+# instrumentation; peak memory comes from one extra run under tracemalloc.
+#
+#   python benchmarks/benchmark_suite.py --output bench.json
+#   python benchmarks/benchmark_suite.py --resolutions 5000 50000 --cprofile principal_axes
+
+parser = argparse.ArgumentParser(description="Benchmark calculate_vbc_profile stage by stage.")
+parser.add_argument("--resolutions", type=int, nargs="+", default=[2000, 8000, 32000, 128000],
+                    help="Faces per synthetic vertebra (default: 2000 8000 32000 128000).")
+parser.add_argument("--levels", type=int, default=17, help="Vertebrae per synthetic spine (default: 17).")
+parser.add_argument("--repeats", type=int, default=3, help="Timed runs per dataset (default: 3).")
+parser.add_argument("--mode", choices=["soup", "unique"], default="soup", help="Vertex loader mode.")
+parser.add_argument("--output", default=None, help="Write the results as JSON to this file.")
+parser.add_argument("--cprofile", nargs="*", default=None, metavar="STAGE",
+                    help="Print cProfile statistics of these stages (all if none are named).")
+args = parser.parse_args()
+
+stl_dir = os.path.join(os.path.dirname(__file__), '..', 'stl')
+workdir = tempfile.mkdtemp(prefix="scoliomorph_bench_")
+datasets = [("stl", stl_dir)]
+for n_faces in args.resolutions:
+    folder = os.path.join(workdir, f"synthetic_{n_faces}")
+    write_synthetic_spine(folder, args.levels, n_faces)
+    datasets.append((f"synthetic_{n_faces}", folder))
+
+results = []
+try:
+    for name, folder in datasets:
+        filenames = list_stl_files(folder)
+        triangles = sum(len(load_stl_triangles(os.path.join(folder, filename))) for filename in filenames)
+
+        # Best of several uninstrumented runs, per stage
+        stages = {}
+        for _ in range(args.repeats):
+            _, profiler = profile_vbc_profile(folder, args.mode)
+            for stage, timing in profiler.report().items():
+                stages[stage] = min(stages.get(stage, np.inf), timing["seconds"])
+        total = sum(stages.values())
+
+        # One run under tracemalloc (and cProfile if requested) for memory and call statistics
+        profiler = StageProfiler(cprofile=args.cprofile is not None, trace_memory=True)
+        profile_vbc_profile(folder, args.mode, profiler)
+        profiler.close()
+        peaks = profiler.peak_bytes
+
+        results.append({
+            "dataset": name,
+            "files": len(filenames),
+            "triangles": triangles,
+            "stages": {stage: {"seconds": seconds, "peak_bytes": peaks.get(stage, 0)}
+                       for stage, seconds in stages.items()},
+            "total_seconds": total,
+            "vertebrae_per_second": len(filenames) / total,
+            "peak_bytes": max(peaks.values()),
+        })
+
+        print(f"\n{name}: {len(filenames)} files, {triangles} triangles, "
+              f"{len(filenames) / total:8.1f} vertebrae/s, peak {max(peaks.values()) / 2**20:.1f} MiB")
+        for stage, seconds in stages.items():
+            print(f"  {stage:>16}: {seconds * 1000:9.2f} ms ({100 * seconds / total:5.1f}%), "
+                  f"peak {peaks.get(stage, 0) / 2**20:7.2f} MiB")
+        if args.cprofile is not None:
+            for stage in args.cprofile or stages:
+                print(f"\n--- cProfile: {name} / {stage} ---")
+                print(profiler.stats(stage))
+finally:
+    shutil.rmtree(workdir, ignore_errors=True)
+
+if args.output:
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "mode": args.mode,
+        "repeats": args.repeats,
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
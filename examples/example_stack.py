@@ -20,5 +20,6 @@ for item in stl_properties:
 # Plot the stacked points with vectors showing angles
 # sma.plot_vbc_profile(stl_properties)
 
-# Plot the stacked vertebral bodies with STL files. slow with limited memory. careful with large number of files
-sma.plot_stl_files(folder_path, plot_type='mesh', color='red', alpha=0.6)
\ No newline at end of file
+# Plot the stacked vertebral bodies with STL files. Each mesh is decimated to max_faces, which keeps
+# full spines interactive. Leave out max_faces for the full resolution (slow with limited memory)
+sma.plot_stl_files(folder_path, plot_type='mesh', color='red', alpha=0.6, max_faces=5000)
\ No newline at end of file
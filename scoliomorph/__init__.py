@@ -0,0 +1,31 @@
+"""Spatial orientation analysis of vertebral body point clouds."""
+import importlib
+
+# Public names and the submodule that defines them; submodules are imported on first use
+# so that e.g. the command line interface does not pay for what it does not need
+_EXPORTS = {
+    "load_stl_file": "analysis",
+    "calculate_principal_axes": "analysis",
+    "calculate_vbc_profile": "analysis",
+    "normalize_angles": "analysis",
+    "set_axes_equal": "plotting",
+    "plot_2d_angles_with_labels": "plotting",
+    "plot_point_cloud_fixed_axes": "plotting",
+    "plot_vbc_profile": "plotting",
+    "plot_stl_files": "plotting",
+    "VBCProfile": "results",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{_EXPORTS[name]}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
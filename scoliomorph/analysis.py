@@ -1,325 +1,322 @@
 import numpy as np
-import matplotlib.pyplot as plt
 from stl import mesh
 import os
-import trimesh
 
-def load_stl_file(filepath):
-    """Load STL file and extract the points from the mesh."""
+from .results import VBCProfile
+
+# Bump whenever the orientation output of process_stl_file changes; invalidates cached results
+ALGORITHM_VERSION = 2
+
+def load_stl_file(filepath, mode='soup', return_faces=False, return_counts=False):
+    """
+    Load STL file and extract the points from the mesh.
+
+    Parameters:
+    filepath : str
+        Path to the STL file.
+    mode : str
+        'soup' returns the triangle soup with every triangle corner as a point, so shared
+        vertices are repeated and the PCA is weighted by triangle count (original behaviour).
+        'unique' returns each distinct vertex once. Default is 'soup'.
+    return_faces : bool
+        If True, also return the (M, 3) face indices into the returned points.
+    return_counts : bool
+        If True, also return the number of triangle corners sharing each returned point.
+        Passing these as weights to `calculate_principal_axes` reproduces the 'soup' result.
+
+    Returns the points, followed by faces and counts when requested.
+    """
     your_mesh = mesh.Mesh.from_file(filepath)
     points = your_mesh.vectors.reshape(-1, 3)
-    return points
 
-def calculate_principal_axes(selected_points):
-    """Calculate pitch, roll, yaw based on the principal axes of the point cloud."""
-    centroid = np.mean(selected_points, axis=0)
+    if mode == 'soup':
+        faces = np.arange(len(points)).reshape(-1, 3)
+        counts = np.ones(len(points), dtype=np.intp)
+    elif mode == 'unique':
+        points, faces, counts = deduplicate_vertices(points)
+    else:
+        raise ValueError(f"Unknown mode '{mode}'. Use 'soup' or 'unique'.")
+
+    if not (return_faces or return_counts):
+        return points
+    output = (points,)
+    if return_faces:
+        output += (faces,)
+    if return_counts:
+        output += (counts,)
+    return output
+
+def load_stl_triangles(filepath):
+    """Load STL file and return its (M, 3, 3) triangle vertices."""
+    return mesh.Mesh.from_file(filepath).vectors
+
+def unique_points(points):
+    """
+    Merge bit-identical rows of an (N, 3) point array.
+
+    Returns the unique points, the index of each input row into them and their multiplicities.
+    """
+    # Adding 0.0 folds -0.0 into 0.0 so both hash to the same bytes
+    points = np.ascontiguousarray(points + points.dtype.type(0))
+    keys = points.view(np.dtype((np.void, points.dtype.itemsize * 3))).ravel()
+    _, index, inverse, counts = np.unique(keys, return_index=True, return_inverse=True, return_counts=True)
+    return points[index], inverse.ravel(), counts
+
+def deduplicate_vertices(points):
+    """
+    Merge bit-identical vertices of a triangle soup.
+
+    Returns the unique vertices, the (M, 3) face indices into them (for a soup of M
+    triangles) and the number of soup corners that collapsed into each vertex.
+    """
+    unique, inverse, counts = unique_points(points)
+    return unique, inverse.reshape(-1, 3), counts
+
+def calculate_principal_axes(selected_points, weights=None):
+    """
+    Calculate pitch, roll, yaw based on the principal axes of the point cloud.
+
+    Optional integer `weights` count how often each point occurs, e.g. the
+    `return_counts` output of `load_stl_file(..., mode='unique')`.
+    """
+    if weights is None:
+        centroid = np.mean(selected_points, axis=0)
+    else:
+        centroid = np.average(selected_points, axis=0, weights=weights)
     centered_points = selected_points - centroid
-    cov_matrix = np.cov(centered_points.T)
-    eigenvalues, eigenvectors = np.linalg.eig(cov_matrix)
-    sorted_indices = np.argsort(eigenvalues)[::-1]
-    sorted_eigenvectors = eigenvectors[:, sorted_indices]
-    
+    cov_matrix = np.cov(centered_points.T, fweights=weights)
+    pitch, roll, yaw, sorted_eigenvectors = principal_axes_from_covariance(cov_matrix)
+    return pitch, roll, yaw, centroid, centered_points, sorted_eigenvectors
+
+def principal_axes_from_covariance(cov_matrix, reference=None):
+    """
+    Calculate pitch, roll, yaw and the sorted principal axes from a 3x3 covariance matrix.
+
+    Uses the symmetric eigen-solver and the deterministic axis convention of
+    `canonicalize_axes`, optionally anchored to the `reference` axes (e.g. the
+    previous vertebra).
+    """
+    pitch, roll, yaw, sorted_eigenvectors = principal_axes_from_covariances(np.asarray(cov_matrix)[None], reference)
+    return pitch[0], roll[0], yaw[0], sorted_eigenvectors[0]
+
+def principal_axes_from_covariances(cov_matrices, reference=None):
+    """
+    Calculate pitch, roll, yaw for a stack of covariance matrices in one vectorized pass.
+
+    Parameters:
+    cov_matrices : ndarray
+        (N, 3, 3) symmetric covariance (or second-moment) matrices.
+    reference : ndarray
+        Optional (3, 3) or (N, 3, 3) axes to anchor the axis signs to, see `canonicalize_axes`.
+
+    Returns pitch, roll and yaw as (N,) arrays and the (N, 3, 3) right-handed principal
+    axes, with columns sorted by decreasing eigenvalue and deterministic signs.
+    """
+    eigenvalues, eigenvectors = np.linalg.eigh(cov_matrices)
+    # eigh sorts ascending; reverse to put the major axis first
+    sorted_eigenvectors = canonicalize_axes(eigenvectors[..., ::-1], reference)
+    pitch, roll, yaw = angles_from_axes(sorted_eigenvectors)
+    return pitch, roll, yaw, sorted_eigenvectors
+
+def canonicalize_axes(axes, reference=None):
+    """
+    Fix the sign ambiguity of a (..., 3, 3) stack of principal axes (as columns).
+
+    Without a `reference`, the first two axes are anchored to the global frame by making
+    their largest-magnitude component positive. With a `reference` (3, 3) or (..., 3, 3)
+    stack, they are flipped to point the same way as the corresponding reference axis.
+    The third axis is then set to the cross product of the first two, so the result is
+    always a right-handed rotation matrix.
+    """
+    axes = np.array(axes, dtype=np.float64)
+    if reference is None:
+        anchor = np.take_along_axis(axes, np.argmax(np.abs(axes), axis=-2)[..., None, :], axis=-2)[..., 0, :]
+    else:
+        anchor = np.einsum('...ij,...ij->...j', axes, np.asarray(reference))
+    axes *= np.where(anchor < 0, -1.0, 1.0)[..., None, :]
+    axes[..., :, 2] = np.cross(axes[..., :, 0], axes[..., :, 1])
+    return axes
+
+def align_axes_sequence(axes):
+    """
+    Anchor the axis signs of an (..., N, 3, 3) stack of consecutive vertebrae to the previous vertebra.
+
+    The first vertebra keeps its axes; the first two axes of every following one are flipped
+    to point the same way as its (already aligned) predecessor and the third axis is their
+    cross product. Since the flips are +/-1 factors this is a cumulative product, computed
+    without a Python loop, also over any leading batch dimensions (e.g. many spines).
+    """
+    axes = np.array(axes, dtype=np.float64)
+    if axes.shape[-3] < 2:
+        return axes
+    dots = np.einsum('...nij,...nij->...nj', axes[..., 1:, :, :2], axes[..., :-1, :, :2])
+    signs = np.cumprod(np.where(dots < 0, -1.0, 1.0), axis=-2)
+    axes[..., 1:, :, :2] *= signs[..., None, :]
+    axes[..., :, 2] = np.cross(axes[..., :, 0], axes[..., :, 1])
+    return axes
+
+def angles_from_axes(axes, normalize=True):
+    """
+    Calculate pitch, roll, yaw from sorted principal axes.
+
+    `axes` is a (3, 3) matrix or an (N, 3, 3) stack with the axes as columns. Angles are
+    returned as scalars or (N,) arrays, normalized to [-90°, 90°] unless `normalize` is False.
+    """
+    axes = np.asarray(axes)
+
     # Define axes
-    x_axis = sorted_eigenvectors[:, 0]
-    y_axis = sorted_eigenvectors[:, 1]
-    z_axis = sorted_eigenvectors[:, 2]
-    
+    x_axis = axes[..., :, 0]
+    y_axis = axes[..., :, 1]
+    z_axis = axes[..., :, 2]
+
     # Pitch: rotation around X-axis
-    pitch = normalize_angles(np.arctan2(x_axis[2], x_axis[1]) * 180 / np.pi)
-    
+    pitch = np.arctan2(x_axis[..., 2], x_axis[..., 1]) * 180 / np.pi
+
     # Roll: rotation around Y-axis
-    roll = normalize_angles(np.arctan2(y_axis[2], y_axis[0]) * 180 / np.pi)
-    
+    roll = np.arctan2(y_axis[..., 2], y_axis[..., 0]) * 180 / np.pi
+
     # Yaw: rotation around Z-axis
-    yaw = normalize_angles(np.arctan2(z_axis[1], z_axis[0]) * 180 / np.pi)
-    
-    return pitch, roll, yaw, centroid, centered_points, sorted_eigenvectors
+    yaw = np.arctan2(z_axis[..., 1], z_axis[..., 0]) * 180 / np.pi
 
-# Function to calculate and store results
-def calculate_vbc_profile(folder_path):
-    """ Calculate the vertebral column geometric properties for each STL file in the folder."""
-    result = []
+    if normalize:
+        pitch, roll, yaw = normalize_angles(pitch), normalize_angles(roll), normalize_angles(yaw)
+    return pitch, roll, yaw
 
-    # Loop through sorted STL files in the folder
-    for filename in sorted(os.listdir(folder_path)):
-        if filename.endswith(".stl"):
-            filepath = os.path.join(folder_path, filename)
-            points = load_stl_file(filepath)
-            
-            # Calculate pitch, roll, and yaw
+def list_stl_files(folder_path):
+    """Return the sorted STL file names in a folder."""
+    return [filename for filename in sorted(os.listdir(folder_path)) if filename.endswith(".stl")]
+
+def process_stl_file(filepath, mode='soup', method='points', chunk_size=None, component='all'):
+    """
+    Load a single STL file and return its geometric properties as a result entry.
+
+    `method` selects the orientation backend: 'points' for the point cloud covariance
+    (using the `mode` loader), 'robust' for the voxel-subsampled covariance of
+    `scoliomorph.robust`, 'area' or 'volume' for the closed-form mesh moments.
+    'robust' uses the default settings of `calculate_principal_axes_robust` and skips its
+    angular error estimate; call that function directly for other settings or the error.
+    With a `chunk_size`, the file is streamed in chunks of that many triangles instead
+    of being loaded at once; this needs mode='soup', as deduplication needs the whole mesh,
+    and is not available for the 'robust' method, which subsamples the whole point cloud.
+    `component` is 'all', or 'largest' to drop loose fragments and keep only the largest
+    connected component (see `scoliomorph.validation`); it needs the whole mesh, so it
+    cannot be combined with `chunk_size`.
+    """
+    if chunk_size is None:
+        return process_triangles(load_stl_triangles(filepath), os.path.basename(filepath), mode, method, component)
+    if chunk_size < 1:
+        raise ValueError(f"chunk_size must be at least 1, got {chunk_size}.")
+    if mode != 'soup':
+        raise ValueError(f"mode='{mode}' needs the whole mesh and cannot be combined with chunk_size.")
+    if method == 'robust':
+        raise ValueError("method='robust' needs the whole point cloud and cannot be combined with chunk_size.")
+    if component != 'all':
+        raise ValueError("component='largest' needs the whole mesh and cannot be combined with chunk_size.")
+
+    from .streaming import calculate_principal_axes_streaming
+    pitch, roll, yaw, centroid, principal_axes = calculate_principal_axes_streaming(filepath, method, chunk_size)
+    return _result_entry(os.path.basename(filepath), pitch, roll, yaw, centroid, principal_axes)
+
+def process_triangles(triangles, filename, mode='soup', method='points', component='all'):
+    """Return the result entry of an already loaded (M, 3, 3) triangle array, as `process_stl_file` does."""
+    if component == 'largest':
+        from .validation import largest_component
+        triangles = largest_component(triangles)
+    elif component != 'all':
+        raise ValueError(f"Unknown component '{component}'. Use 'all' or 'largest'.")
+    if method in ('points', 'robust'):
+        points = triangles.reshape(-1, 3)
+        if mode == 'unique':
+            points = deduplicate_vertices(points)[0]
+        elif mode != 'soup':
+            raise ValueError(f"Unknown mode '{mode}'. Use 'soup' or 'unique'.")
+
+        # Calculate pitch, roll, and yaw
+        if method == 'points':
             pitch, roll, yaw, centroid, centered_points, principal_axes = calculate_principal_axes(points)
-            
-            # Store the results in a structure
-            result.append({
-                "filename": filename,
-                "pitch": pitch,
-                "roll": roll,
-                "yaw": yaw,
-                "centroid": centroid,
-                "principal_axes": principal_axes
-            })
-    
-    return result
+        else:
+            from .robust import calculate_principal_axes_robust
+            pitch, roll, yaw, centroid, principal_axes, _ = calculate_principal_axes_robust(points, error_draws=0)
+    elif method in ('area', 'volume'):
+        from .moments import calculate_principal_axes_from_mesh
+        pitch, roll, yaw, centroid, principal_axes = calculate_principal_axes_from_mesh(triangles, method)
+    else:
+        raise ValueError(f"Unknown method '{method}'. Use 'points', 'robust', 'area' or 'volume'.")
+    return _result_entry(filename, pitch, roll, yaw, centroid, principal_axes)
+
+def _result_entry(filename, pitch, roll, yaw, centroid, principal_axes):
+    """Store the results of one vertebra in a structure."""
+    return {
+        "filename": filename,
+        "pitch": pitch,
+        "roll": roll,
+        "yaw": yaw,
+        "centroid": centroid,
+        "principal_axes": principal_axes
+    }
+
+def assemble_profile(result, folder_path, axis_anchor='global'):
+    """Assemble the result entries of one spine folder into a `VBCProfile`, applying the `axis_anchor`."""
+    profile = VBCProfile.from_entries(result, spine=folder_path)
+    if axis_anchor == 'previous':
+        profile.axes = align_axes_sequence(profile.axes)
+    elif axis_anchor != 'global':
+        raise ValueError(f"Unknown axis_anchor '{axis_anchor}'. Use 'global' or 'previous'.")
+    return profile
 
-def plot_2d_angles_with_labels(pitch, roll, yaw, principal_axes, centered_points):
-    """Plot the pitch, roll, yaw along with the point cloud projections."""
-    fig, axs = plt.subplots(1, 3, figsize=(15, 5))
-    
-    scale = 50
-
-    # Plot Pitch (YZ-plane projection)
-    axs[0].scatter(centered_points[:, 1], centered_points[:, 2], s=1, color='gray', alpha=0.5)  # Projection on YZ-plane
-    axs[0].plot([-scale, scale], [0, 0], color='r', linewidth=1, label='Global Z Axis')
-    # Plot the Pitch Axis in both positive and negative directions in one line
-    axs[0].plot([0, principal_axes[1, 0] * scale, -principal_axes[1, 0] * scale],
-            [0, principal_axes[2, 0] * scale, -principal_axes[2, 0] * scale],
-            color='r', linestyle='--', linewidth=0.75, label='Pitch Axis')
-    axs[0].set_xlim(-scale, scale)
-    axs[0].set_ylim(-scale, scale)
-    axs[0].set_title(f'Pitch: {pitch:.2f}° (YZ-plane)')
-    axs[0].set_xlabel('Z-axis')
-    axs[0].set_ylabel('Y-axis')
-    axs[0].legend()
-
-    # Add angle label for pitch
-    # axs[0].text(principal_axes[1, 0] * scale / 2, principal_axes[2, 0] * scale / 2, f'{pitch:.2f}°', color='r')
-
-    # Plot Roll (XZ-plane projection)
-    axs[1].scatter(centered_points[:, 0], centered_points[:, 2], s=1, color='gray', alpha=0.5)  # Projection on XZ-plane
-    axs[1].plot([-scale, scale], [0, 0], color='g', linewidth=1, label='Global X Axis')
-    # Plot the Roll Axis in both positive and negative directions in one line
-    axs[1].plot([0, principal_axes[0, 1] * scale, -principal_axes[0, 1] * scale], 
-            [0, principal_axes[2, 1] * scale, -principal_axes[2, 1] * scale],
-            color='g', linestyle='--', linewidth=0.75, label='Roll Axis')
-    axs[1].set_xlim(-scale, scale)
-    axs[1].set_ylim(-scale, scale)
-    axs[1].set_title(f'Roll: {roll:.2f}° (XZ-plane)')
-    axs[1].set_xlabel('X-axis')
-    axs[1].set_ylabel('Z-axis')
-    axs[1].legend()
-
-    # Add angle label for roll
-    # axs[1].text(principal_axes[0, 1] * scale / 2, principal_axes[2, 1] * scale / 2, f'{roll:.2f}°', color='g')
-
-    # Plot Yaw (XY-plane projection)
-    axs[2].scatter(centered_points[:, 0], centered_points[:, 1], s=1, color='gray', alpha=0.5)  # Projection on XY-plane
-    axs[2].plot([-scale, scale], [0, 0], color='b', linewidth=1, label='Global X Axis')
-    # Plot the Yaw Axis in both positive and negative directions in one line
-    axs[2].plot([0, principal_axes[0, 2] * scale, -principal_axes[0, 2] * scale], 
-            [0, principal_axes[1, 2] * scale, -principal_axes[1, 2] * scale],
-            color='b', linestyle='--', linewidth=0.75, label='Yaw Axis')
-    axs[2].set_xlim(-scale, scale)
-    axs[2].set_ylim(-scale, scale)
-    axs[2].set_title(f'Yaw: {yaw:.2f}° (XY-plane)')
-    axs[2].set_xlabel('X-axis')
-    axs[2].set_ylabel('Y-axis')
-    axs[2].legend()
-
-    # Add angle label for yaw
-    # axs[2].text(principal_axes[0, 2] * scale / 2, principal_axes[1, 2] * scale / 2, f'{yaw:.2f}°', color='b')
-
-    # Show the 2D plot
-    plt.tight_layout()
-    plt.show()
-    
+# Function to calculate and store results
+def calculate_vbc_profile(folder_path, mode='soup', method='points', chunk_size=None, cache=None,
+                          axis_anchor='global', component='all'):
+    """
+    Calculate the vertebral column geometric properties for each STL file in the folder.
 
-# Function to plot point cloud and principal axes with fixed global coordinate system and angular lines
-def plot_point_cloud_fixed_axes(centered_points, principal_axes, pitch, roll, yaw):
-    """ Plot the point cloud with fixed global coordinate system and angular lines."""
-    fig = plt.figure()
-    ax = fig.add_subplot(111, projection='3d')
-    
-    # Adjust points by centroid shift to simulate stacking
-    # adjusted_points = centered_points + prev_centroid_shift
-    # If you want to disable stacking correction, comment the line above and uncomment the line below
-    adjusted_points = centered_points
-    
-    # Plot points
-    ax.scatter(adjusted_points[:, 0], adjusted_points[:, 1], adjusted_points[:, 2], s=1, color='gray', alpha=0.5)
-    
-    # Define the scale of the axes
-    scale = 50
-    
-    # Plot global X, Y, Z axes for reference (fixed global coordinate system)
-    ax.quiver(0, 0, 0, scale, 0, 0, color='r', label='Global X Axis')
-    ax.quiver(0, 0, 0, 0, scale, 0, color='g', label='Global Y Axis')
-    ax.quiver(0, 0, 0, 0, 0, scale, color='b', label='Global Z Axis')
-
-    # Plot lines to show angular rotation relative to the global axes
-    # Red line for X-axis
-    ax.plot([0, principal_axes[0, 0] * scale], [0, principal_axes[1, 0] * scale], [0, principal_axes[2, 0] * scale], 
-            color='r', linestyle='--', linewidth=0.8, label='Pitch Angle')
-
-    # Green line for Y-axis
-    ax.plot([0, principal_axes[0, 1] * scale], [0, principal_axes[1, 1] * scale], [0, principal_axes[2, 1] * scale], 
-            color='g', linestyle='--', linewidth=0.8, label='Roll Angle')
-
-    # Blue line for Z-axis
-    ax.plot([0, principal_axes[0, 2] * scale], [0, principal_axes[1, 2] * scale], [0, principal_axes[2, 2] * scale], 
-            color='b', linestyle='--', linewidth=0.8, label='Yaw Angle')
-
-    # Show the angles in a consistent reference frame
-    ax.text2D(0.05, 0.95, f'Pitch: {pitch:.2f}°\nRoll: {roll:.2f}°\nYaw: {yaw:.2f}°', transform=ax.transAxes)
-    
-    # Set labels and fixed view
-    ax.set_xlabel('X')
-    ax.set_ylabel('Y')
-    ax.set_zlabel('Z')
-    ax.view_init(elev=20, azim=30)  # Fix view for consistency across plots
-    
-    # Show plot
-    plt.show()
-    
+    `mode` selects the vertex loader, `method` the orientation backend, `chunk_size`
+    enables streaming and `component` selects the connected components that are used,
+    see `process_stl_file`. With an `OrientationCache` as `cache`,
+    files that were processed before with the same options are not parsed again.
+    `axis_anchor` is 'global' to anchor each vertebra's axis signs to the global frame, or
+    'previous' to anchor them to the previous vertebra (see `align_axes_sequence`).
 
-def plot_stl_files(folder_path, plot_type='pointcloud', color='blue', alpha=1.0):
+    Returns a `VBCProfile`, which iterates like the former list of result dicts.
     """
-    Function to load STL files from a folder, align points to (x, y) = (0, 0), and plot them.
-    
-    Parameters:
-    folder_path : str
-        Path to the folder containing STL files.
-    plot_type : str
-        Type of plot ('pointcloud' or 'mesh'). Default is 'pointcloud'.
-    color : str
-        Color for the plot (e.g., 'red', 'blue'). Default is 'blue'.
-    alpha : float
-        Transparency level for the plot (0.0 to 1.0). Default is 1.0 (opaque).
-    """
-    
-    # Set up the 3D plot
-    fig = plt.figure()
-    ax = fig.add_subplot(111, projection='3d')
-
-    # Iterate through all STL files in the folder
-    for filename in os.listdir(folder_path):
-        if filename.endswith(".stl"):
-            file_path = os.path.join(folder_path, filename)
-            print(f"Processing file: {filename}")
-            
-            # Load the STL file
-            mesh = trimesh.load(file_path)
-
-            # Get the vertices (points)
-            vertices = mesh.vertices
-
-            # Calculate centroid and shift points so that the centroid is at (x=0, y=0)
-            centroid = np.mean(vertices, axis=0)
-            aligned_vertices = vertices - [centroid[0], centroid[1], 0]  # Only adjust x, y
-            
-            # Plot based on the chosen plot type
-            if plot_type == 'pointcloud':
-                ax.scatter(aligned_vertices[:, 0], aligned_vertices[:, 1], aligned_vertices[:, 2], 
-                           color=color, alpha=alpha, label=filename)
-            elif plot_type == 'mesh':
-                faces = mesh.faces
-                ax.plot_trisurf(aligned_vertices[:, 0], aligned_vertices[:, 1], aligned_vertices[:, 2], 
-                                triangles=faces, color=color, alpha=alpha, label=filename)
-    
-    # Add labels and legend
-    ax.set_xlabel('X axis')
-    ax.set_ylabel('Y axis')
-    ax.set_zlabel('Z axis')
-    plt.title('Aligned STL Files')
-    # plt.legend() # Uncomment to show legend
-    # Set equal aspect ratio for 3D plot
-    set_axes_equal(ax)
-    plt.show()
+    result = []
 
+    # Loop through sorted STL files in the folder
+    for filename in list_stl_files(folder_path):
+        filepath = os.path.join(folder_path, filename)
+        if cache is None:
+            result.append(process_stl_file(filepath, mode=mode, method=method, chunk_size=chunk_size,
+                                           component=component))
+        else:
+            result.append(cache.process(filepath, mode=mode, method=method, chunk_size=chunk_size,
+                                        component=component))
     
-# Function to plot stacked points with vectors showing angles
-def plot_vbc_profile(result):
-    """Plot the point cloud centroids of the vertebral column units with pitch, roll, and yaw vectors"""
-    fig = plt.figure()
-    ax = fig.add_subplot(111, projection='3d')
-
-    # To stack the point clouds, we'll need to adjust centroids to align them
-    cumulative_shift = np.zeros(3)
-    scale = 30  # Length of the vector for visualizing the axes
-
-    # Loop through the result structure to plot each point cloud
-    for item in result:
-        centroid = item['centroid'] 
-        
-        # Plot the centroid as a point
-        ax.scatter(centroid[0], centroid[1], centroid[2], color='black', s=20)
-        
-       # Plot the principal axes (showing pitch, roll, yaw) as vectors
-
-        # Plot Pitch Axis (Positive and Negative directions)
-        ax.quiver(centroid[0], centroid[1], centroid[2], 
-                item['principal_axes'][0, 0] * scale, 
-                item['principal_axes'][1, 0] * scale, 
-                item['principal_axes'][2, 0] * scale, 
-                color='r', label='Pitch Axis (Positive)')
-        ax.quiver(centroid[0], centroid[1], centroid[2], 
-                -item['principal_axes'][0, 0] * scale, 
-                -item['principal_axes'][1, 0] * scale, 
-                -item['principal_axes'][2, 0] * scale, 
-                color='r', linestyle='--', label='Pitch Axis (Negative)')
-
-        # Plot Roll Axis (Positive and Negative directions)
-        ax.quiver(centroid[0], centroid[1], centroid[2], 
-                item['principal_axes'][0, 1] * scale, 
-                item['principal_axes'][1, 1] * scale, 
-                item['principal_axes'][2, 1] * scale, 
-                color='g', label='Roll Axis (Positive)')
-        ax.quiver(centroid[0], centroid[1], centroid[2], 
-                -item['principal_axes'][0, 1] * scale, 
-                -item['principal_axes'][1, 1] * scale, 
-                -item['principal_axes'][2, 1] * scale, 
-                color='g', linestyle='--', label='Roll Axis (Negative)')
-
-        # Plot Yaw Axis (Positive and Negative directions)
-        ax.quiver(centroid[0], centroid[1], centroid[2], 
-                item['principal_axes'][0, 2] * scale, 
-                item['principal_axes'][1, 2] * scale, 
-                item['principal_axes'][2, 2] * scale, 
-                color='b', label='Yaw Axis (Positive)')
-        ax.quiver(centroid[0], centroid[1], centroid[2], 
-                -item['principal_axes'][0, 2] * scale, 
-                -item['principal_axes'][1, 2] * scale, 
-                -item['principal_axes'][2, 2] * scale, 
-                color='b', linestyle='--', label='Yaw Axis (Negative)')
-
-        # Update cumulative shift to stack the next cloud on top
-        cumulative_shift += item['centroid']
-
-    ax.set_xlabel('X-axis')
-    ax.set_ylabel('Y-axis')
-    ax.set_zlabel('Z-axis')
-    plt.title('Stacked Point Clouds with Pitch, Roll, Yaw Vectors')
-
-    # Set equal aspect ratio for 3D plot
-    set_axes_equal(ax)
-
-    plt.show()
-
+    return assemble_profile(result, folder_path, axis_anchor)
 
 def normalize_angles(angle):
     """
     Normalize pitch, roll, and yaw to stay within the range [-90°, +90°]
     by converting them to their complementary angles if they exceed 90° or -90°.
+    Accepts a single angle or an array of angles.
     """
     def normalize_angle(angle):
-        """Normalize an individual angle to stay within [-90°, 90°]."""
-        if angle > 90:
-            return angle - 180
-        elif angle < -90:
-            return angle + 180
-        return angle
-
-    # Normalize pitch, roll, and yaw
-    normalized_angle = normalize_angle(angle)
+        """Normalize angles elementwise to stay within [-90°, 90°]."""
+        angle = np.asarray(angle)
+        return np.where(angle > 90, angle - 180, np.where(angle < -90, angle + 180, angle))
+
+    # Normalize pitch, roll, and yaw; [()] returns a scalar for scalar input
+    normalized_angle = normalize_angle(angle)[()]
     return normalized_angle
 
-def set_axes_equal(ax):
-    """Set 3D plot axes to equal scale."""
-    limits = np.array([ax.get_xlim3d(), ax.get_ylim3d(), ax.get_zlim3d()])
-    spans = np.abs(limits[:, 1] - limits[:, 0])
-    centers = np.mean(limits, axis=1)
-    max_span = max(spans)
-    
-    # Set the axis limits to be centered and proportional
-    ax.set_xlim3d([centers[0] - max_span / 2, centers[0] + max_span / 2])
-    ax.set_ylim3d([centers[1] - max_span / 2, centers[1] + max_span / 2])
-    ax.set_zlim3d([centers[2] - max_span / 2, centers[2] + max_span / 2])
+
+# The plotting functions live in scoliomorph.plotting so that this module imports with numpy
+# and numpy-stl only; the old names still work and load matplotlib on first access
+_PLOTTING_NAMES = ("plot_2d_angles_with_labels", "plot_point_cloud_fixed_axes", "plot_stl_files",
+                   "plot_vbc_profile", "set_axes_equal")
+
+
+def __getattr__(name):
+    if name in _PLOTTING_NAMES:
+        from . import plotting
+        return getattr(plotting, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,111 @@
+import os
+from collections import deque
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+
+from .analysis import list_stl_files, process_stl_file, assemble_profile
+
+
+def _resolve_jobs(n_jobs):
+    """Return the number of worker processes to use (None or <= 0 means all cores)."""
+    if n_jobs is None or n_jobs <= 0:
+        return os.cpu_count() or 1
+    return n_jobs
+
+
+def calculate_cohort_profiles(folder_paths, n_jobs=None, max_pending_folders=None, mode='soup',
+                              method='points', chunk_size=None, cache=None, axis_anchor='global', component='all'):
+    """
+    Calculate the vertebral column profile of many spine folders in parallel.
+
+    Every STL file of every folder is loaded and decomposed in a pool of worker
+    processes. Results are yielded per folder, in the order of `folder_paths`,
+    as soon as all files of that folder are finished. Each result is identical
+    to `calculate_vbc_profile(folder_path)`.
+
+    Parameters:
+    folder_paths : iterable of str
+        Paths to the spine folders containing STL files.
+    n_jobs : int
+        Number of worker processes. Default is None (one per CPU core).
+        With n_jobs=1 the folders are processed serially in this process.
+    max_pending_folders : int
+        Number of folders submitted ahead of the one being yielded, which bounds
+        memory for very large cohorts. Default is 4 * n_jobs.
+    mode : str
+        Vertex loader mode, see `load_stl_file`. Default is 'soup'.
+    method : str
+        Orientation backend, see `process_stl_file`. Default is 'points'.
+    chunk_size : int
+        Stream each file in chunks of this many triangles. Default is None (load at once).
+    cache : OrientationCache
+        Cache of previous results. Hits are served in this process and only misses are
+        sent to the workers; their results are stored once they come back.
+    axis_anchor : str
+        'global' or 'previous', see `calculate_vbc_profile`. Default is 'global'.
+    component : str
+        'all' or 'largest' connected component, see `process_stl_file`. Default is 'all'.
+
+    Yields:
+    (folder_path, VBCProfile) tuples.
+    """
+    n_jobs = _resolve_jobs(n_jobs)
+    if axis_anchor not in ('global', 'previous'):
+        raise ValueError(f"Unknown axis_anchor '{axis_anchor}'. Use 'global' or 'previous'.")
+    options = dict(mode=mode, method=method, chunk_size=chunk_size, component=component)
+    process = partial(process_stl_file, **options)
+
+    if n_jobs == 1:
+        if cache is not None:
+            process = partial(cache.process, **options)
+        for folder_path in folder_paths:
+            result = [process(os.path.join(folder_path, filename)) for filename in list_stl_files(folder_path)]
+            yield folder_path, assemble_profile(result, folder_path, axis_anchor)
+        return
+
+    if max_pending_folders is None:
+        max_pending_folders = 4 * n_jobs
+
+    folders = iter(folder_paths)
+    pending = deque()
+
+    with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+
+        def submit_next():
+            folder_path = next(folders, None)
+            if folder_path is None:
+                return False
+            futures = []
+            for filename in list_stl_files(folder_path):
+                filepath = os.path.join(folder_path, filename)
+                entry = cache.get(filepath, **options) if cache is not None else None
+                futures.append((filepath, entry if entry is not None else executor.submit(process, filepath)))
+            pending.append((folder_path, futures))
+            return True
+
+        while len(pending) < max_pending_folders and submit_next():
+            pass
+
+        while pending:
+            folder_path, futures = pending.popleft()
+            result = []
+            for filepath, future in futures:
+                if isinstance(future, dict):
+                    result.append(future)
+                    continue
+                entry = future.result()
+                if cache is not None:
+                    cache.put(filepath, entry, **options)
+                result.append(entry)
+            submit_next()
+            yield folder_path, assemble_profile(result, folder_path, axis_anchor)
+
+
+def main(argv=None):
+    """Command line interface, kept for `python -m scoliomorph.batch`; the same as the `scoliomorph` command."""
+    from .cli import main as cli_main
+    cli_main(argv)
+
+
+if __name__ == "__main__":
+    main()
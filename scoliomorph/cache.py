@@ -0,0 +1,200 @@
+import os
+import io
+import json
+import time
+import sqlite3
+import hashlib
+import inspect
+import numpy as np
+
+from .analysis import ALGORITHM_VERSION, process_stl_file
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    digest TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    digest TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    options TEXT NOT NULL,
+    payload BLOB NOT NULL,
+    nbytes INTEGER NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access);
+CREATE TABLE IF NOT EXISTS quality (
+    digest TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    metrics TEXT NOT NULL,
+    PRIMARY KEY (digest, version)
+);
+"""
+
+# Defaults of the processing options, so omitted and explicit defaults share a cache key
+_DEFAULT_OPTIONS = {name: parameter.default
+                    for name, parameter in inspect.signature(process_stl_file).parameters.items()
+                    if parameter.default is not inspect.Parameter.empty}
+
+
+def file_digest(filepath, block_size=1 << 20):
+    """Return the BLAKE2b hex digest of a file's content."""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(filepath, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class OrientationCache:
+    """
+    Persistent on-disk cache of per-vertebra orientation results.
+
+    Entries are keyed by the file content hash, `ALGORITHM_VERSION` and the processing
+    options, so a changed file, algorithm or option never returns a stale result. The
+    content hash itself is remembered per path together with the file's mtime and size,
+    so unchanged files are recognised from `os.stat` alone without re-reading them.
+    Least recently used entries are evicted beyond `max_entries` or `max_bytes`.
+    Mesh quality metrics of `scoliomorph.validation` are kept alongside under the same
+    content hash; they are small and not counted towards the limits.
+
+    Parameters:
+    path : str
+        Path to the SQLite cache file. It is created if it does not exist.
+    max_entries : int
+        Maximum number of cached results. Default is None (unbounded).
+    max_bytes : int
+        Maximum total payload size in bytes. Default is None (unbounded).
+    fast_path : bool
+        Trust mtime and size to skip re-hashing unchanged files. Default is True.
+    """
+
+    def __init__(self, path, max_entries=None, max_bytes=None, fast_path=True):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.fast_path = fast_path
+        self.hits = 0
+        self.misses = 0
+        self._connection = sqlite3.connect(path, timeout=30)
+        # WAL keeps the per-hit access time updates cheap and lets several readers share the file
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(_SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self._connection.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def close(self):
+        """Close the underlying database connection."""
+        self._connection.close()
+
+    def clear(self):
+        """Remove all cached entries, quality metrics and file digests."""
+        with self._connection:
+            self._connection.execute("DELETE FROM entries")
+            self._connection.execute("DELETE FROM quality")
+            self._connection.execute("DELETE FROM files")
+
+    def digest(self, filepath):
+        """Return the content digest of a file, using the mtime+size fast path if enabled."""
+        path = os.path.abspath(filepath)
+        stat = os.stat(path)
+        if self.fast_path:
+            row = self._connection.execute(
+                "SELECT digest FROM files WHERE path = ? AND mtime_ns = ? AND size = ?",
+                (path, stat.st_mtime_ns, stat.st_size)).fetchone()
+            if row is not None:
+                return row[0]
+        digest = file_digest(path)
+        with self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO files (path, mtime_ns, size, digest) VALUES (?, ?, ?, ?)",
+                (path, stat.st_mtime_ns, stat.st_size, digest))
+        return digest
+
+    @staticmethod
+    def _key(digest, options):
+        options = json.dumps(dict(_DEFAULT_OPTIONS, **options), sort_keys=True)
+        key = hashlib.blake2b(f"{digest}:{ALGORITHM_VERSION}:{options}".encode(), digest_size=20).hexdigest()
+        return key, options
+
+    def get(self, filepath, **options):
+        """Return the cached result entry of a file for the given options, or None."""
+        key, _ = self._key(self.digest(filepath), options)
+        row = self._connection.execute("SELECT payload FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        with self._connection:
+            self._connection.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+        self.hits += 1
+        with np.load(io.BytesIO(row[0])) as data:
+            return {
+                "filename": os.path.basename(filepath),
+                "pitch": data["angles"][0],
+                "roll": data["angles"][1],
+                "yaw": data["angles"][2],
+                "centroid": data["centroid"],
+                "principal_axes": data["principal_axes"]
+            }
+
+    def put(self, filepath, entry, **options):
+        """Store the result entry of a file for the given options."""
+        digest = self.digest(filepath)
+        key, options = self._key(digest, options)
+        buffer = io.BytesIO()
+        np.savez(buffer, angles=np.array([entry["pitch"], entry["roll"], entry["yaw"]]),
+                 centroid=entry["centroid"], principal_axes=entry["principal_axes"])
+        payload = buffer.getvalue()
+        with self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO entries (key, digest, version, options, payload, nbytes, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, digest, ALGORITHM_VERSION, options, payload, len(payload), time.time()))
+        self._evict()
+
+    def process(self, filepath, **options):
+        """Return the result entry of `process_stl_file(filepath, **options)`, computing it only on a cache miss."""
+        entry = self.get(filepath, **options)
+        if entry is None:
+            entry = process_stl_file(filepath, **options)
+            self.put(filepath, entry, **options)
+        return entry
+
+    def get_quality(self, filepath, version):
+        """Return the cached quality metrics of a file, or None."""
+        row = self._connection.execute("SELECT metrics FROM quality WHERE digest = ? AND version = ?",
+                                       (self.digest(filepath), version)).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def put_quality(self, filepath, metrics, version):
+        """Store the quality metrics (a JSON-serializable dict) of a file."""
+        with self._connection:
+            self._connection.execute("INSERT OR REPLACE INTO quality (digest, version, metrics) VALUES (?, ?, ?)",
+                                     (self.digest(filepath), version, json.dumps(metrics)))
+
+    def _evict(self):
+        """Drop least recently used entries until the size limits are met."""
+        with self._connection:
+            if self.max_entries is not None:
+                self._connection.execute(
+                    "DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY last_access DESC "
+                    "LIMIT -1 OFFSET ?)", (self.max_entries,))
+            if self.max_bytes is not None:
+                total = self._connection.execute("SELECT COALESCE(SUM(nbytes), 0) FROM entries").fetchone()[0]
+                rows = self._connection.execute("SELECT key, nbytes FROM entries ORDER BY last_access").fetchall()
+                for key, nbytes in rows:
+                    if total <= self.max_bytes:
+                        break
+                    self._connection.execute("DELETE FROM entries WHERE key = ?", (key,))
+                    total -= nbytes
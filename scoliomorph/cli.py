@@ -0,0 +1,234 @@
+import os
+import sys
+import csv
+import glob
+import json
+import argparse
+
+# Only the standard library is imported at module level; the analysis modules are
+# imported in `main` once the arguments are known, and never pull in matplotlib or trimesh
+
+FORMATS = ("csv", "jsonl", "json", "parquet")
+_COLUMNS = ("spine", "filename", "level", "pitch", "roll", "yaw", "centroid_x", "centroid_y", "centroid_z")
+
+
+def _has_stl_files(folder_path):
+    return any(filename.endswith(".stl") for filename in os.listdir(folder_path))
+
+
+def resolve_spine_folders(inputs, recursive=False):
+    """
+    Expand folder arguments into the list of spine folders to process.
+
+    Every input may be a folder or a glob pattern (`**` matches any depth). With
+    `recursive`, every folder below an input that contains STL files is a spine;
+    otherwise only the inputs themselves are. Duplicates are dropped, order is kept.
+    """
+    folders = []
+    for pattern in inputs:
+        matches = sorted(glob.glob(pattern, recursive=True)) if glob.has_magic(pattern) else [pattern]
+        for path in matches:
+            if not os.path.isdir(path):
+                continue
+            if recursive:
+                for root, dirs, _ in os.walk(path):
+                    dirs.sort()
+                    if _has_stl_files(root):
+                        folders.append(root)
+            elif _has_stl_files(path):
+                folders.append(path)
+    return list(dict.fromkeys(os.path.normpath(folder) for folder in folders))
+
+
+def profile_rows(profile):
+    """Yield one output row (a dict of `_COLUMNS`) per vertebra of a `VBCProfile`."""
+    for index in range(len(profile)):
+        centroid = profile.centroids[index]
+        yield {
+            "spine": profile.spine[index],
+            "filename": profile.filenames[index],
+            "level": profile.levels[index],
+            "pitch": float(profile.pitch[index]),
+            "roll": float(profile.roll[index]),
+            "yaw": float(profile.yaw[index]),
+            "centroid_x": float(centroid[0]),
+            "centroid_y": float(centroid[1]),
+            "centroid_z": float(centroid[2]),
+        }
+
+
+class ProgressBar:
+    """Minimal text progress bar on a stream (stderr), redrawn in place."""
+
+    def __init__(self, total, stream=sys.stderr, width=30, enabled=True):
+        self.total = total
+        self.stream = stream
+        self.width = width
+        self.enabled = enabled
+        self.done = 0
+
+    def update(self, label=""):
+        self.done += 1
+        if not self.enabled:
+            return
+        filled = self.width * self.done // max(self.total, 1)
+        self.stream.write(f"\r[{'#' * filled}{'.' * (self.width - filled)}] {self.done}/{self.total} {label[-40:]:<40}")
+        if self.done == self.total:
+            self.stream.write("\n")
+        self.stream.flush()
+
+
+def _iterate_profiles(folders, args, cache, timings):
+    """Yield (folder, VBCProfile), timing the stages as finely as the chosen backend allows."""
+    options = dict(mode=args.mode, method=args.method, cache=cache, axis_anchor=args.axis_anchor,
+                   component=args.component)
+    if args.jobs == 1 and args.chunk_size is None:
+        from .pipeline import calculate_vbc_profile_pipelined
+        for folder in folders:
+            yield folder, calculate_vbc_profile_pipelined(folder, prefetch=args.prefetch, timings=timings, **options)
+        return
+
+    from .batch import calculate_cohort_profiles
+    profiles = calculate_cohort_profiles(folders, n_jobs=args.jobs, chunk_size=args.chunk_size, **options)
+    while True:
+        with timings.measure("compute"):
+            item = next(profiles, None)
+        if item is None:
+            return
+        yield item
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="scoliomorph",
+        description="Calculate pitch, roll, yaw and centroids of every vertebra in one or many spine folders.")
+    parser.add_argument("inputs", nargs="+",
+                        help="Spine folders containing STL files, or glob patterns (quote them, '**' recurses).")
+    parser.add_argument("-r", "--recursive", action="store_true",
+                        help="Treat every folder below the inputs that contains STL files as a spine.")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="Number of worker processes; 0 uses one per CPU core (default: 1).")
+    parser.add_argument("-f", "--format", choices=FORMATS, default=None,
+                        help="Output format (default: from the output file extension, else csv).")
+    parser.add_argument("-o", "--output", default=None,
+                        help="Output file (default: standard output; required for parquet).")
+    parser.add_argument("--mode", choices=["soup", "unique"], default="soup",
+                        help="Vertex loader mode (default: soup).")
+    parser.add_argument("--method", choices=["points", "robust", "area", "volume"], default="points",
+                        help="Orientation backend (default: points).")
+    parser.add_argument("--axis-anchor", choices=["global", "previous"], default="global",
+                        help="Anchor axis signs to the global frame or to the previous vertebra (default: global).")
+    parser.add_argument("--component", choices=["all", "largest"], default="all",
+                        help="Use all connected components or only the largest one of each mesh (default: all).")
+    parser.add_argument("--validate", action="store_true",
+                        help="Check mesh quality first and skip spines with rejected files (cached with --cache).")
+    parser.add_argument("--chunk-size", type=int, default=None,
+                        help="Stream STL files in chunks of this many triangles (default: load at once).")
+    parser.add_argument("--prefetch", type=int, default=4,
+                        help="Files read ahead in the background with --jobs 1 (default: 4).")
+    parser.add_argument("--cache", default=None,
+                        help="Path to an orientation cache file reused across runs.")
+    progress = parser.add_mutually_exclusive_group()
+    progress.add_argument("--progress", dest="progress", action="store_true", default=None,
+                          help="Always show the progress bar on stderr.")
+    progress.add_argument("--no-progress", dest="progress", action="store_false",
+                          help="Never show the progress bar (default: only on a terminal).")
+    parser.add_argument("--timings", action="store_true",
+                        help="Print the wall time per stage as JSON on stderr at the end.")
+    return parser
+
+
+def main(argv=None):
+    """Entry point of the `scoliomorph` command."""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.chunk_size is not None and args.chunk_size < 1:
+        parser.error("--chunk-size must be at least 1")
+    if args.chunk_size is not None and (args.method == "robust" or args.mode != "soup" or args.component != "all"):
+        parser.error("--chunk-size streams the triangle soup; it cannot be combined with --method robust, "
+                     "--mode unique or --component largest")
+    output_format = args.format
+    if output_format is None:
+        extension = os.path.splitext(args.output or "")[1].lstrip(".").lower()
+        output_format = extension if extension in FORMATS else "csv"
+    if output_format == "parquet" and args.output is None:
+        sys.exit("scoliomorph: parquet output needs --output")
+
+    from .pipeline import StageTimings
+    timings = StageTimings()
+    with timings.measure("discover"):
+        folders = resolve_spine_folders(args.inputs, args.recursive)
+    if not folders:
+        sys.exit("scoliomorph: no folders with STL files found")
+
+    cache = None
+    if args.cache:
+        from .cache import OrientationCache
+        cache = OrientationCache(args.cache)
+
+    if args.validate:
+        from .validation import validate_spine, rejected_files
+        # --component largest removes loose fragments, so they are no reason to reject a spine
+        thresholds = {"min_largest_component_fraction": None} if args.component == "largest" else {}
+        checked = []
+        for folder in folders:
+            with timings.measure("validate"):
+                report = validate_spine(folder, cache, **thresholds)
+            rejected = rejected_files(report)
+            for filename in rejected:
+                sys.stderr.write(f"scoliomorph: rejected {os.path.join(folder, filename)}: "
+                                 f"{'; '.join(report[filename]['issues'])}\n")
+            if not rejected:
+                checked.append(folder)
+        if not checked:
+            sys.exit(f"scoliomorph: all {len(folders)} spine(s) were rejected by --validate")
+        folders = checked
+
+    show_progress = sys.stderr.isatty() if args.progress is None else args.progress
+    progress = ProgressBar(len(folders), enabled=show_progress)
+    stream = open(args.output, "w", newline="") if args.output and output_format != "parquet" else sys.stdout
+    profiles, rows = [], []
+    try:
+        writer = None
+        if output_format == "csv":
+            writer = csv.DictWriter(stream, fieldnames=_COLUMNS)
+            writer.writeheader()
+        for folder, profile in _iterate_profiles(folders, args, cache, timings):
+            with timings.measure("write"):
+                if output_format == "csv":
+                    writer.writerows(profile_rows(profile))
+                elif output_format == "jsonl":
+                    for row in profile_rows(profile):
+                        stream.write(json.dumps(row) + "\n")
+                elif output_format == "json":
+                    rows.extend(profile_rows(profile))
+                else:
+                    profiles.append(profile)
+                stream.flush()
+            progress.update(folder)
+
+        with timings.measure("write"):
+            if output_format == "json":
+                json.dump(rows, stream, indent=1)
+                stream.write("\n")
+            elif output_format == "parquet":
+                # Write the file named by -o, whatever its extension (VBCProfile.save goes by the suffix)
+                from .results import VBCProfile
+                table = VBCProfile.concatenate(profiles).to_arrow()
+                import pyarrow.parquet as pq
+                pq.write_table(table, args.output)
+    finally:
+        if stream is not sys.stdout:
+            stream.close()
+        if cache is not None:
+            cache.close()
+
+    if args.timings:
+        report = {"spines": len(folders), "stages": timings.as_dict()}
+        if cache is not None:
+            report["cache"] = {"hits": cache.hits, "misses": cache.misses}
+        sys.stderr.write(json.dumps(report, indent=1) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+import os
+from functools import lru_cache
+import numpy as np
+
+from .analysis import load_stl_file
+
+
+def voxel_cluster(vertices, voxel_size, offset=0.0):
+    """
+    Cluster vertices on a regular voxel grid.
+
+    `offset` shifts the grid by that fraction of a voxel (scalar or per axis, in [0, 1)).
+    Returns the cluster label of every vertex and the mean position of each cluster.
+    """
+    vertices = np.asarray(vertices, dtype=np.float64)
+    cells = np.floor((vertices - vertices.min(axis=0)) / voxel_size + offset).astype(np.int64)
+    # Pack the three cell indices into one integer key so np.unique works on a flat array
+    dims = cells.max(axis=0) + 1
+    keys = (cells[:, 0] * dims[1] + cells[:, 1]) * dims[2] + cells[:, 2]
+    _, labels, counts = np.unique(keys, return_inverse=True, return_counts=True)
+    labels = labels.ravel()
+    centers = np.stack([np.bincount(labels, weights=vertices[:, axis]) for axis in range(3)], axis=1)
+    return labels, centers / counts[:, None]
+
+
+def cluster_mesh(vertices, faces, voxel_size):
+    """Simplify a mesh by vertex clustering; faces collapsed to an edge or point and duplicates are dropped."""
+    labels, centers = voxel_cluster(vertices, voxel_size)
+    faces = labels[faces]
+    keep = (faces[:, 0] != faces[:, 1]) & (faces[:, 1] != faces[:, 2]) & (faces[:, 0] != faces[:, 2])
+    faces = faces[keep]
+    # Two faces over the same three clusters are duplicates regardless of winding
+    _, first = np.unique(np.sort(faces, axis=1), axis=0, return_index=True)
+    faces = faces[np.sort(first)]
+    # Drop clusters no longer referenced by any face
+    used, faces = np.unique(faces, return_inverse=True)
+    return centers[used], faces.reshape(-1, 3)
+
+
+def decimate_mesh(vertices, faces, max_faces, max_iterations=8):
+    """
+    Decimate a mesh to at most `max_faces` faces by voxel-grid vertex clustering.
+
+    The voxel size is first estimated from the surface area (a cell of size h keeps about
+    two faces per h^2 of surface) and then grown until the face budget is met.
+    """
+    vertices = np.asarray(vertices)
+    faces = np.asarray(faces)
+    if len(faces) <= max_faces:
+        return vertices, faces
+
+    corners = vertices[faces].astype(np.float64)
+    area = 0.5 * np.linalg.norm(np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0]), axis=1).sum()
+    voxel_size = np.sqrt(2 * area / max_faces)
+
+    for _ in range(max_iterations):
+        decimated_vertices, decimated_faces = cluster_mesh(vertices, faces, voxel_size)
+        if len(decimated_faces) <= max_faces:
+            break
+        voxel_size *= 1.05 * np.sqrt(len(decimated_faces) / max_faces)
+    return decimated_vertices, decimated_faces
+
+
+def downsample_points(points, max_points, max_iterations=8):
+    """Reduce a point cloud to at most `max_points` voxel-grid cluster centers."""
+    points = np.asarray(points)
+    if len(points) <= max_points:
+        return points
+
+    extent = np.ptp(points, axis=0)
+    # Points on a surface: about one per voxel face of the bounding box surface
+    area = 2 * (extent[0] * extent[1] + extent[1] * extent[2] + extent[0] * extent[2])
+    voxel_size = np.sqrt(area / max_points)
+
+    for _ in range(max_iterations):
+        _, centers = voxel_cluster(points, voxel_size)
+        if len(centers) <= max_points:
+            break
+        voxel_size *= 1.05 * np.sqrt(len(centers) / max_points)
+    return centers
+
+
+@lru_cache(maxsize=128)
+def _load_decimated(filepath, mtime_ns, size, max_faces, max_points):
+    """Cached worker of `load_decimated_mesh`; the file stat is part of the key."""
+    vertices, faces = load_stl_file(filepath, mode='unique', return_faces=True)
+    if max_faces is not None:
+        vertices, faces = decimate_mesh(vertices, faces, max_faces)
+    if max_points is not None:
+        vertices, faces = downsample_points(vertices, max_points), None
+    if faces is not None:
+        faces.flags.writeable = False
+    vertices.flags.writeable = False
+    return vertices, faces
+
+
+def load_decimated_mesh(filepath, max_faces=None, max_points=None):
+    """
+    Load an STL file reduced for rendering, caching the result in memory.
+
+    With `max_faces` the mesh is decimated to that face budget; with `max_points` only a
+    point cloud of at most that many points is returned (faces are then None). The cache is
+    keyed by path, modification time, size and budget, so edited files are reloaded. The
+    returned arrays are read-only because they are shared between calls.
+    """
+    stat = os.stat(filepath)
+    return _load_decimated(os.path.abspath(filepath), stat.st_mtime_ns, stat.st_size, max_faces, max_points)
@@ -0,0 +1,227 @@
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from mpl_toolkits.mplot3d.art3d import Line3DCollection
+
+from .analysis import list_stl_files, load_stl_file, calculate_principal_axes, assemble_profile, _result_entry
+
+# Figures of each kind are built once per process and then only updated
+_FIGURE_POOL = {}
+
+
+def subsample_points(points, max_points, seed=0):
+    """Return at most `max_points` rows of `points`, drawn uniformly without replacement (reproducibly)."""
+    if max_points is None or len(points) <= max_points:
+        return points
+    index = np.random.default_rng(seed).choice(len(points), size=max_points, replace=False)
+    return points[np.sort(index)]
+
+
+class AnglesFigure:
+    """Reusable headless version of `plot_2d_angles_with_labels`."""
+
+    scale = 50
+    # (point cloud columns, axis column, axis components, color, angle name, plane, x label, y label, global axis)
+    panels = (
+        ((1, 2), 0, (1, 2), 'r', 'Pitch', 'YZ', 'Z-axis', 'Y-axis', 'Global Z Axis'),
+        ((0, 2), 1, (0, 2), 'g', 'Roll', 'XZ', 'X-axis', 'Z-axis', 'Global X Axis'),
+        ((0, 1), 2, (0, 1), 'b', 'Yaw', 'XY', 'X-axis', 'Y-axis', 'Global X Axis'),
+    )
+
+    def __init__(self):
+        self.figure = Figure(figsize=(15, 5))
+        FigureCanvasAgg(self.figure)
+        axs = self.figure.subplots(1, 3)
+        self.scatters, self.lines = [], []
+        for ax, (_, _, _, color, name, plane, xlabel, ylabel, global_label) in zip(axs, self.panels):
+            self.scatters.append(ax.scatter([], [], s=1, color='gray', alpha=0.5))
+            ax.plot([-self.scale, self.scale], [0, 0], color=color, linewidth=1, label=global_label)
+            line, = ax.plot([], [], color=color, linestyle='--', linewidth=0.75, label=f'{name} Axis')
+            self.lines.append(line)
+            ax.set_xlim(-self.scale, self.scale)
+            ax.set_ylim(-self.scale, self.scale)
+            ax.set_title(f'{name}: 0.00° ({plane}-plane)')  # placeholder so tight_layout leaves room
+            ax.set_xlabel(xlabel)
+            ax.set_ylabel(ylabel)
+            ax.legend()
+        self.axs = axs
+        self.figure.tight_layout()
+
+    def update(self, pitch, roll, yaw, principal_axes, centered_points):
+        """Replace the data of all artists in place."""
+        for ax, scatter, line, angle, (columns, axis, components, _, name, plane, *_) in zip(
+                self.axs, self.scatters, self.lines, (pitch, roll, yaw), self.panels):
+            scatter.set_offsets(centered_points[:, columns])
+            u, v = principal_axes[components[0], axis] * self.scale, principal_axes[components[1], axis] * self.scale
+            line.set_data([0, u, -u], [0, v, -v])
+            ax.set_title(f'{name}: {angle:.2f}° ({plane}-plane)')
+
+    def save(self, path):
+        self.figure.savefig(path)
+
+
+class PointCloudFigure:
+    """Reusable headless version of `plot_point_cloud_fixed_axes`."""
+
+    scale = 50
+
+    def __init__(self):
+        self.figure = Figure()
+        FigureCanvasAgg(self.figure)
+        ax = self.figure.add_subplot(111, projection='3d')
+        self.scatter = ax.scatter([], [], [], s=1, color='gray', alpha=0.5)
+        ax.quiver(0, 0, 0, self.scale, 0, 0, color='r', label='Global X Axis')
+        ax.quiver(0, 0, 0, 0, self.scale, 0, color='g', label='Global Y Axis')
+        ax.quiver(0, 0, 0, 0, 0, self.scale, color='b', label='Global Z Axis')
+        self.lines = [ax.plot([], [], [], color=color, linestyle='--', linewidth=0.8, label=label)[0]
+                      for color, label in (('r', 'Pitch Angle'), ('g', 'Roll Angle'), ('b', 'Yaw Angle'))]
+        self.text = ax.text2D(0.05, 0.95, '', transform=ax.transAxes)
+        ax.set_xlabel('X')
+        ax.set_ylabel('Y')
+        ax.set_zlabel('Z')
+        ax.view_init(elev=20, azim=30)
+        self.ax = ax
+
+    def update(self, centered_points, principal_axes, pitch, roll, yaw):
+        """Replace the data of all artists in place."""
+        self.scatter._offsets3d = (centered_points[:, 0], centered_points[:, 1], centered_points[:, 2])
+        for column, line in enumerate(self.lines):
+            end = principal_axes[:, column] * self.scale
+            line.set_data_3d([0, end[0]], [0, end[1]], [0, end[2]])
+        self.text.set_text(f'Pitch: {pitch:.2f}°\nRoll: {roll:.2f}°\nYaw: {yaw:.2f}°')
+        extent = np.abs(centered_points).max() if len(centered_points) else self.scale
+        for set_limits in (self.ax.set_xlim3d, self.ax.set_ylim3d, self.ax.set_zlim3d):
+            set_limits(-extent, extent)
+
+    def save(self, path):
+        self.figure.savefig(path)
+
+
+class ProfileFigure:
+    """Reusable headless version of `plot_vbc_profile`; the axes are drawn as lines through each centroid."""
+
+    scale = 30
+
+    def __init__(self):
+        self.figure = Figure()
+        FigureCanvasAgg(self.figure)
+        ax = self.figure.add_subplot(111, projection='3d')
+        self.scatter = ax.scatter([], [], [], color='black', s=20)
+        self.collections = []
+        for color, name in (('r', 'Pitch'), ('g', 'Roll'), ('b', 'Yaw')):
+            collection = Line3DCollection([np.zeros((2, 3))], colors=color, label=f'{name} Axis')
+            ax.add_collection3d(collection)
+            self.collections.append(collection)
+        ax.set_xlabel('X-axis')
+        ax.set_ylabel('Y-axis')
+        ax.set_zlabel('Z-axis')
+        ax.set_title('Stacked Point Clouds with Pitch, Roll, Yaw Vectors')
+        self.ax = ax
+
+    def update(self, profile):
+        """Replace the centroids and axis segments in place."""
+        centroids = profile.centroids
+        self.scatter._offsets3d = (centroids[:, 0], centroids[:, 1], centroids[:, 2])
+        for column, collection in enumerate(self.collections):
+            vectors = profile.axes[:, :, column] * self.scale
+            collection.set_segments(np.stack([centroids - vectors, centroids + vectors], axis=1))
+        # Equal scale on all axes, as set_axes_equal
+        center = (centroids.max(axis=0) + centroids.min(axis=0)) / 2 if len(centroids) else np.zeros(3)
+        half_span = max(np.ptp(centroids, axis=0).max() / 2, self.scale) if len(centroids) else self.scale
+        self.ax.set_xlim3d(center[0] - half_span, center[0] + half_span)
+        self.ax.set_ylim3d(center[1] - half_span, center[1] + half_span)
+        self.ax.set_zlim3d(center[2] - half_span, center[2] + half_span)
+
+    def save(self, path):
+        self.figure.savefig(path)
+
+
+_FIGURE_TYPES = {"angles": AnglesFigure, "pointcloud": PointCloudFigure, "profile": ProfileFigure}
+
+
+def get_figure(kind):
+    """Return this process's reusable figure of the given kind ('angles', 'pointcloud' or 'profile')."""
+    if kind not in _FIGURE_POOL:
+        _FIGURE_POOL[kind] = _FIGURE_TYPES[kind]()
+    return _FIGURE_POOL[kind]
+
+
+def export_spine_figures(folder_path, output_dir, kinds=("angles", "pointcloud", "profile"), formats=("png",),
+                         max_points=5000):
+    """
+    Write the QA figures of one spine folder without opening any window.
+
+    One 'angles' and 'pointcloud' figure is written per vertebra and one 'profile' figure
+    per spine, into `output_dir`, for every format in `formats` (e.g. 'png', 'svg').
+    Point clouds are subsampled to `max_points` before plotting. Returns the written paths.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    written = []
+    result = []
+
+    def save(figure, stem):
+        for extension in formats:
+            path = os.path.join(output_dir, f"{stem}.{extension}")
+            figure.save(path)
+            written.append(path)
+
+    for filename in list_stl_files(folder_path):
+        points = load_stl_file(os.path.join(folder_path, filename))
+        pitch, roll, yaw, centroid, centered_points, principal_axes = calculate_principal_axes(points)
+        result.append(_result_entry(filename, pitch, roll, yaw, centroid, principal_axes))
+        shown_points = subsample_points(centered_points, max_points)
+        stem = os.path.splitext(filename)[0]
+
+        if "angles" in kinds:
+            figure = get_figure("angles")
+            figure.update(pitch, roll, yaw, principal_axes, shown_points)
+            save(figure, f"{stem}_angles")
+        if "pointcloud" in kinds:
+            figure = get_figure("pointcloud")
+            figure.update(shown_points, principal_axes, pitch, roll, yaw)
+            save(figure, f"{stem}_pointcloud")
+
+    if "profile" in kinds and result:
+        figure = get_figure("profile")
+        figure.update(assemble_profile(result, folder_path))
+        save(figure, "profile")
+    return written
+
+
+def _output_names(folder_paths):
+    """Output folder name per spine folder: its path below the common parent, else its base name."""
+    folders = [os.path.abspath(folder_path) for folder_path in folder_paths]
+    if not folders:
+        return []
+    common = os.path.commonpath(folders)
+    names = []
+    for folder in folders:
+        name = os.path.relpath(folder, common)
+        names.append(os.path.basename(folder) if name == os.curdir else name)
+    return names
+
+
+def export_cohort_figures(folder_paths, output_dir, kinds=("angles", "pointcloud", "profile"), formats=("png",),
+                          max_points=5000, n_jobs=None):
+    """
+    Write the QA figures of many spine folders in parallel worker processes.
+
+    Each folder is rendered by `export_spine_figures` into `output_dir/<folder path>/`, where
+    the folder path is relative to the folders' common parent (e.g. 'p1/visit1' and
+    'p2/visit1'); every worker reuses its own figures for all vertebrae it renders. Returns
+    a dict of written paths per folder, in the order of `folder_paths`.
+    """
+    folder_paths = list(folder_paths)
+    targets = [os.path.join(output_dir, name) for name in _output_names(folder_paths)]
+    duplicates = sorted({target for target in targets if targets.count(target) > 1})
+    if duplicates:
+        raise ValueError(f"Several spine folders would be written to {', '.join(duplicates)}.")
+    arguments = (folder_paths, targets, [kinds] * len(folder_paths), [formats] * len(folder_paths),
+                 [max_points] * len(folder_paths))
+    if n_jobs == 1:
+        written = map(export_spine_figures, *arguments)
+        return dict(zip(folder_paths, written))
+    with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+        return dict(zip(folder_paths, executor.map(export_spine_figures, *arguments)))
@@ -0,0 +1,137 @@
+import os
+import time
+import numpy as np
+
+from .analysis import list_stl_files, process_stl_file, assemble_profile, normalize_angles
+
+
+class IncrementalProfile:
+    """
+    Vertebral column profile of a spine folder that is kept up to date file by file.
+
+    `refresh()` rescans the folder and recomputes only added or modified STL files
+    (detected by modification time and size); `notify(filepath)` forces a file to be
+    recomputed on the next refresh, e.g. from a file system watcher. Derived
+    inter-vertebral quantities are patched in place instead of rebuilt:
+
+    - `delta_angles` (N-1, 3): pitch, roll, yaw of each level minus the level below it, wrapped
+      to [-90°, 90°] like the angles themselves (axis angles are only defined modulo 180°).
+    - `offsets` (N-1, 3): centroid of each level minus the centroid of the level below it.
+    - `cumulative_shift` (N, 3): running sum of the offsets, i.e. each centroid relative to the first.
+
+    Parameters:
+    folder_path : str
+        Path to the spine folder containing STL files.
+    mode, method, chunk_size, cache, axis_anchor, component :
+        As for `calculate_vbc_profile`.
+    """
+
+    def __init__(self, folder_path, mode='soup', method='points', chunk_size=None, cache=None,
+                 axis_anchor='global', component='all'):
+        self.folder_path = folder_path
+        self.options = dict(mode=mode, method=method, chunk_size=chunk_size, component=component)
+        self.cache = cache
+        self.axis_anchor = axis_anchor
+        self.filenames = []
+        self._entries = {}
+        self._signatures = {}
+        self._dirty = set()
+        self.profile = None
+        self.delta_angles = np.empty((0, 3))
+        self.offsets = np.empty((0, 3))
+        self.cumulative_shift = np.empty((0, 3))
+        self.refresh()
+
+    def _signature(self, filename):
+        stat = os.stat(os.path.join(self.folder_path, filename))
+        return stat.st_mtime_ns, stat.st_size
+
+    def _process(self, filename):
+        filepath = os.path.join(self.folder_path, filename)
+        if self.cache is None:
+            return process_stl_file(filepath, **self.options)
+        return self.cache.process(filepath, **self.options)
+
+    def notify(self, filepath):
+        """Mark a file as changed so that the next `refresh` recomputes it."""
+        self._dirty.add(os.path.basename(filepath))
+
+    def refresh(self):
+        """
+        Rescan the folder and recompute what changed.
+
+        Returns a dict with the 'added', 'modified' and 'removed' file names.
+        """
+        filenames = list_stl_files(self.folder_path)
+        signatures = {filename: self._signature(filename) for filename in filenames}
+        added = [filename for filename in filenames if filename not in self._entries]
+        removed = [filename for filename in self.filenames if filename not in signatures]
+        modified = [filename for filename in filenames
+                    if filename in self._entries
+                    and (filename in self._dirty or signatures[filename] != self._signatures[filename])]
+        self._dirty.clear()
+
+        for filename in removed:
+            del self._entries[filename]
+            del self._signatures[filename]
+        for filename in added + modified:
+            self._entries[filename] = self._process(filename)
+            self._signatures[filename] = signatures[filename]
+
+        changes = {"added": added, "modified": modified, "removed": removed}
+        if added or removed or self.profile is None:
+            self.filenames = filenames
+            self._rebuild()
+        elif modified:
+            self._patch([filenames.index(filename) for filename in modified])
+        return changes
+
+    def _rebuild(self):
+        """Assemble the profile and all derived quantities from scratch (level list changed)."""
+        self.profile = assemble_profile([self._entries[filename] for filename in self.filenames],
+                                        self.folder_path, self.axis_anchor)
+        self.delta_angles = normalize_angles(np.diff(self.profile.angles, axis=0))
+        self.offsets = np.diff(self.profile.centroids, axis=0)
+        self.cumulative_shift = np.concatenate([np.zeros((1, 3)), np.cumsum(self.offsets, axis=0)])
+
+    def _patch(self, indices):
+        """Update the rows of modified levels and the derived quantities that depend on them."""
+        profile = self.profile
+        for index in indices:
+            entry = self._entries[self.filenames[index]]
+            profile.pitch[index] = entry["pitch"]
+            profile.roll[index] = entry["roll"]
+            profile.yaw[index] = entry["yaw"]
+            profile.centroids[index] = entry["centroid"]
+            profile.axes[index] = entry["principal_axes"]
+
+        if self.axis_anchor == 'previous':
+            # Anchoring propagates upwards from the first modified level
+            start = min(indices)
+            profile.axes[start:] = assemble_profile(
+                [self._entries[filename] for filename in self.filenames], self.folder_path, 'previous').axes[start:]
+
+        # Only the pairs touching a modified level change
+        pairs = np.unique(np.clip(np.concatenate([np.asarray(indices) - 1, indices]), 0, max(len(self.offsets) - 1, 0)))
+        if len(self.offsets):
+            angles = profile.angles
+            self.delta_angles[pairs] = normalize_angles(angles[pairs + 1] - angles[pairs])
+            self.offsets[pairs] = profile.centroids[pairs + 1] - profile.centroids[pairs]
+            start = pairs.min()
+            self.cumulative_shift[start + 1:] = self.cumulative_shift[start] + np.cumsum(self.offsets[start:], axis=0)
+
+    def watch(self, poll_interval=0.5, callback=None, stop=None):
+        """
+        Poll the folder and refresh whenever something changed.
+
+        `callback(changes)` is called after every refresh that found changes. Runs until the
+        `stop` event (a `threading.Event`) is set, or forever if none is given.
+        """
+        while stop is None or not stop.is_set():
+            changes = self.refresh()
+            if callback is not None and any(changes.values()):
+                callback(changes)
+            if stop is None:
+                time.sleep(poll_interval)
+            else:
+                stop.wait(poll_interval)
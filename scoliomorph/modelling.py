@@ -0,0 +1,226 @@
+import numpy as np
+
+from .analysis import align_axes_sequence
+
+# Column of the global frame used as lateral (x), anterior-posterior (y) and cranio-caudal (z) direction
+_PLANES = {"coronal": 0, "sagittal": 1}
+
+
+def relative_rotations(axes, align=True):
+    """
+    Rotation between adjacent levels, as rotation matrices.
+
+    Parameters:
+    axes : ndarray
+        (..., N, 3, 3) principal axes (columns) of N consecutive vertebrae, e.g. `VBCProfile.axes`
+        or a stack of several spines.
+    align : bool
+        Anchor the axis signs of each level to the previous one first (`align_axes_sequence`),
+        so that sign flips of the principal axes do not show up as 180° rotations.
+
+    Returns (..., N-1, 3, 3) matrices R_i = A_i^T A_(i+1): the orientation of level i+1
+    expressed in the frame of level i.
+    """
+    axes = np.asarray(axes, dtype=np.float64)
+    if align:
+        axes = align_axes_sequence(axes)
+    return np.swapaxes(axes[..., :-1, :, :], -1, -2) @ axes[..., 1:, :, :]
+
+
+def rotation_angle(rotations):
+    """Rotation angle in degrees of a (..., 3, 3) stack of rotation matrices."""
+    trace = np.trace(rotations, axis1=-2, axis2=-1)
+    return np.degrees(np.arccos(np.clip((trace - 1) / 2, -1.0, 1.0)))
+
+
+def rotations_to_quaternions(rotations):
+    """
+    Convert a (..., 3, 3) stack of rotation matrices to (..., 4) unit quaternions (w, x, y, z), w >= 0.
+
+    Uses Shepperd's method: for each matrix the largest of w, x, y, z is computed from the
+    diagonal and the others from the off-diagonal terms, which is numerically stable.
+    """
+    R = np.asarray(rotations, dtype=np.float64)
+    r00, r11, r22 = R[..., 0, 0], R[..., 1, 1], R[..., 2, 2]
+    trace = r00 + r11 + r22
+    candidates = np.stack([trace, r00, r11, r22], axis=-1)
+    case = np.argmax(candidates, axis=-1)
+
+    q = np.empty(R.shape[:-2] + (4,))
+    s = np.sqrt(np.maximum(1 + 2 * np.max(candidates, axis=-1) - trace, 1e-300)) * 2
+    d21, d02, d10 = R[..., 2, 1] - R[..., 1, 2], R[..., 0, 2] - R[..., 2, 0], R[..., 1, 0] - R[..., 0, 1]
+    s21, s02, s10 = R[..., 2, 1] + R[..., 1, 2], R[..., 0, 2] + R[..., 2, 0], R[..., 1, 0] + R[..., 0, 1]
+    solutions = (
+        np.stack([s / 4, d21 / s, d02 / s, d10 / s], axis=-1),
+        np.stack([d21 / s, s / 4, s10 / s, s02 / s], axis=-1),
+        np.stack([d02 / s, s10 / s, s / 4, s21 / s], axis=-1),
+        np.stack([d10 / s, s02 / s, s21 / s, s / 4], axis=-1),
+    )
+    for index, solution in enumerate(solutions):
+        mask = case == index
+        q[mask] = solution[mask]
+    q *= np.where(q[..., :1] < 0, -1.0, 1.0)
+    return q / np.linalg.norm(q, axis=-1, keepdims=True)
+
+
+def fit_centerline(centroids):
+    """
+    Fit a natural cubic spline through the centroids of each spine, parameterised by level index.
+
+    `centroids` is (..., N, 3). Returns the (..., N, 3) second derivatives at the knots, which
+    together with the centroids define the spline (see `evaluate_centerline`). The spline system
+    only depends on N, so it is solved once for all spines and coordinates.
+    """
+    centroids = np.asarray(centroids, dtype=np.float64)
+    n = centroids.shape[-2]
+    second = np.zeros_like(centroids)
+    if n < 3:
+        return second
+    # M_(i-1) + 4 M_i + M_(i+1) = 6 (P_(i+1) - 2 P_i + P_(i-1)), with M_0 = M_(N-1) = 0
+    system = 4 * np.eye(n - 2) + np.eye(n - 2, k=1) + np.eye(n - 2, k=-1)
+    rhs = 6 * (centroids[..., 2:, :] - 2 * centroids[..., 1:-1, :] + centroids[..., :-2, :])
+    # Move the level axis to the front so one solve covers every spine and coordinate
+    flat = np.moveaxis(rhs, -2, 0).reshape(n - 2, -1)
+    solution = np.linalg.solve(system, flat).reshape((n - 2,) + rhs.shape[:-2] + (3,))
+    second[..., 1:-1, :] = np.moveaxis(solution, 0, -2)
+    return second
+
+
+def evaluate_centerline(centroids, second, t):
+    """
+    Evaluate the centerline spline at level parameters `t` (0 .. N-1, any shape).
+
+    Returns positions, first and second derivatives, each (..., *t.shape, 3), where the
+    leading axes are the batch axes of `centroids`.
+    """
+    centroids = np.asarray(centroids, dtype=np.float64)
+    n = centroids.shape[-2]
+    t = np.clip(np.asarray(t, dtype=np.float64), 0, n - 1)
+    index = np.minimum(np.floor(t).astype(int), max(n - 2, 0))
+    u = (t - index)[..., None]
+    p0, p1 = centroids[..., index, :], centroids[..., np.minimum(index + 1, n - 1), :]
+    m0, m1 = second[..., index, :], second[..., np.minimum(index + 1, n - 1), :]
+
+    position = (1 - u) * p0 + u * p1 + ((1 - u) ** 3 - (1 - u)) * m0 / 6 + (u ** 3 - u) * m1 / 6
+    tangent = p1 - p0 - (3 * (1 - u) ** 2 - 1) * m0 / 6 + (3 * u ** 2 - 1) * m1 / 6
+    curvature_vector = (1 - u) * m0 + u * m1
+    return position, tangent, curvature_vector
+
+
+def centerline(centroids, samples_per_level=10):
+    """
+    Smooth centerline through the centroids.
+
+    Returns the sample parameters t (level units), the (..., T, 3) points and the (..., T)
+    curvature (1/mm for centroids in mm).
+    """
+    n = np.shape(centroids)[-2]
+    t = np.linspace(0, n - 1, (n - 1) * samples_per_level + 1)
+    second = fit_centerline(centroids)
+    points, first, second_derivative = evaluate_centerline(centroids, second, t)
+    return t, points, curvature(first, second_derivative)
+
+
+def curvature(first, second):
+    """Curvature |r' x r''| / |r'|^3 of a curve from its (..., 3) first and second derivatives."""
+    speed = np.linalg.norm(first, axis=-1)
+    return np.linalg.norm(np.cross(first, second), axis=-1) / np.maximum(speed, 1e-12) ** 3
+
+
+def cobb_angles(centroids, plane='coronal'):
+    """
+    Cobb-like angle of the centerline, with end and apex vertebrae.
+
+    The inclination of the centerline tangent at each level is measured in the chosen plane
+    ('coronal': lateral x against cranio-caudal z, 'sagittal': y against z). The end vertebrae
+    are the two most oppositely tilted levels and the Cobb-like angle is the difference of
+    their inclinations. The apex is the level between them that deviates most from the chord
+    joining the end vertebrae in that plane.
+
+    Parameters:
+    centroids : ndarray
+        (..., N, 3) centroids of consecutive levels of one or many spines.
+
+    Returns a dict of arrays with the leading batch shape: 'cobb_angle' (degrees),
+    'lower_end', 'upper_end' and 'apex' (level indices), and 'inclination' (..., N) in degrees.
+    """
+    centroids = np.asarray(centroids, dtype=np.float64)
+    n = centroids.shape[-2]
+    column = _PLANES[plane]
+    second = fit_centerline(centroids)
+    _, tangent, _ = evaluate_centerline(centroids, second, np.arange(n))
+    # Orient the tangents cranially so the inclination does not jump by 180°
+    tangent = tangent * np.where(tangent[..., 2:3] < 0, -1.0, 1.0)
+    inclination = np.degrees(np.arctan2(tangent[..., column], tangent[..., 2]))
+
+    most_positive = np.argmax(inclination, axis=-1)
+    most_negative = np.argmin(inclination, axis=-1)
+    lower_end = np.minimum(most_positive, most_negative)
+    upper_end = np.maximum(most_positive, most_negative)
+    cobb_angle = np.take_along_axis(inclination, most_positive[..., None], axis=-1)[..., 0] \
+        - np.take_along_axis(inclination, most_negative[..., None], axis=-1)[..., 0]
+
+    # Distance of every level from the chord between the end vertebrae, in the plane
+    projected = centroids[..., [column, 2]]
+    start = np.take_along_axis(projected, lower_end[..., None, None], axis=-2)
+    end = np.take_along_axis(projected, upper_end[..., None, None], axis=-2)
+    chord = end - start
+    chord_length = np.maximum(np.linalg.norm(chord, axis=-1), 1e-12)
+    relative = projected - start
+    distance = np.abs(relative[..., 0] * chord[..., 1] - relative[..., 1] * chord[..., 0]) / chord_length
+    levels = np.arange(n)
+    between = (levels >= lower_end[..., None]) & (levels <= upper_end[..., None])
+    apex = np.argmax(np.where(between, distance, -np.inf), axis=-1)
+
+    return {
+        "cobb_angle": cobb_angle,
+        "lower_end": lower_end,
+        "upper_end": upper_end,
+        "apex": apex,
+        "inclination": inclination,
+    }
+
+
+def model_spines(centroids, axes, samples_per_level=10):
+    """
+    Run the full modelling engine over one spine or a stack of spines with the same number of levels.
+
+    Parameters:
+    centroids : ndarray
+        (..., N, 3) centroids, e.g. `VBCProfile.centroids` or `stack_profiles(...)[0]`.
+    axes : ndarray
+        (..., N, 3, 3) principal axes.
+
+    Returns a dict with 'relative_rotations' (..., N-1, 3, 3), 'relative_quaternions' (..., N-1, 4),
+    'relative_angle' (..., N-1) in degrees, 'centerline' (..., T, 3), 'curvature' (..., T),
+    'max_curvature' (...), and the coronal and sagittal Cobb-like measures of `cobb_angles`
+    prefixed with 'coronal_' and 'sagittal_'.
+    """
+    rotations = relative_rotations(axes)
+    t, points, kappa = centerline(centroids, samples_per_level)
+    model = {
+        "relative_rotations": rotations,
+        "relative_quaternions": rotations_to_quaternions(rotations),
+        "relative_angle": rotation_angle(rotations),
+        "centerline_t": t,
+        "centerline": points,
+        "curvature": kappa,
+        "max_curvature": kappa.max(axis=-1),
+    }
+    for plane in _PLANES:
+        for key, value in cobb_angles(centroids, plane).items():
+            model[f"{plane}_{key}"] = value
+    return model
+
+
+def stack_profiles(profiles):
+    """
+    Stack the centroids and axes of several `VBCProfile`s with the same number of levels.
+
+    Returns (S, N, 3) centroids and (S, N, 3, 3) axes for `model_spines`.
+    """
+    profiles = list(profiles)
+    counts = {len(profile) for profile in profiles}
+    if len(counts) > 1:
+        raise ValueError(f"Profiles have different numbers of levels: {sorted(counts)}. Group them by level count first.")
+    return np.stack([profile.centroids for profile in profiles]), np.stack([profile.axes for profile in profiles])
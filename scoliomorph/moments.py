@@ -0,0 +1,118 @@
+import numpy as np
+
+from .analysis import principal_axes_from_covariance
+
+DEFAULT_CHUNK_SIZE = 16384
+
+
+class MomentAccumulator:
+    """
+    Accumulate the closed-form mass, first and second moments of a triangle mesh.
+
+    Triangles can be added in any number of chunks. The sums are kept in float64
+    relative to a reference point (the first vertex seen), so large coordinate
+    offsets do not cost precision.
+
+    Parameters:
+    weighting : str
+        'area' integrates over the mesh surface, 'volume' over the enclosed solid
+        (signed tetrahedra against the reference point; the mesh must be closed).
+        'points' weights every triangle corner equally and reproduces the sample
+        covariance of `calculate_principal_axes` on the triangle soup.
+    """
+
+    def __init__(self, weighting='area'):
+        if weighting not in ('points', 'area', 'volume'):
+            raise ValueError(f"Unknown weighting '{weighting}'. Use 'points', 'area' or 'volume'.")
+        self.weighting = weighting
+        self.reference = None
+        self.mass = 0.0
+        self.first = np.zeros(3)
+        self.second = np.zeros((3, 3))
+        self.n_triangles = 0
+
+    def add(self, triangles):
+        """Add an (M, 3, 3) array of triangle vertices."""
+        triangles = np.asarray(triangles)
+        if len(triangles) == 0:
+            return
+        if self.reference is None:
+            self.reference = triangles[0, 0].astype(np.float64)
+        v = triangles - self.reference
+        corners = v.reshape(-1, 3)
+        self.n_triangles += len(triangles)
+
+        if self.weighting == 'points':
+            self.mass += len(corners)
+            self.first += corners.sum(axis=0)
+            self.second += corners.T @ corners
+            return
+
+        a, b, c = v[:, 0], v[:, 1], v[:, 2]
+        s = a + b + c
+
+        if self.weighting == 'area':
+            w = 0.5 * np.sqrt(np.square(_cross(b - a, c - a)).sum(axis=1))
+            first_factor, second_factor = 1 / 3, 1 / 12
+        else:
+            w = (a * _cross(b, c)).sum(axis=1) / 6
+            first_factor, second_factor = 1 / 4, 1 / 20
+
+        # Integral of x and x x^T over a triangle (or tetrahedron with the reference point):
+        # w * s / 3 and w / 12 * (a a^T + b b^T + c c^T + s s^T) for triangles, 1/4 and 1/20 for tetrahedra
+        self.mass += w.sum()
+        self.first += first_factor * (w @ s)
+        self.second += second_factor * ((corners.T * np.repeat(w, 3)) @ corners + (s.T * w) @ s)
+
+    def result(self):
+        """Return the centroid and the central second-moment (covariance) tensor."""
+        if self.n_triangles == 0 or self.mass == 0:
+            raise ValueError("Cannot compute moments of an empty or degenerate mesh.")
+        mean = self.first / self.mass
+        centroid = self.reference + mean
+        if self.weighting == 'points':
+            # Unbiased sample covariance, as np.cov
+            covariance = (self.second - self.mass * np.outer(mean, mean)) / (self.mass - 1)
+        else:
+            covariance = self.second / self.mass - np.outer(mean, mean)
+        return centroid, covariance
+
+
+def _cross(u, v):
+    """Row-wise cross product of two (M, 3) arrays, faster than np.cross for small rows."""
+    return np.stack([u[:, 1] * v[:, 2] - u[:, 2] * v[:, 1],
+                     u[:, 2] * v[:, 0] - u[:, 0] * v[:, 2],
+                     u[:, 0] * v[:, 1] - u[:, 1] * v[:, 0]], axis=1)
+
+
+def mesh_moments(triangles, weighting='area', chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Compute the centroid and second-moment tensor of a triangle mesh analytically.
+
+    Parameters:
+    triangles : ndarray
+        (M, 3, 3) triangle vertices, e.g. `stl.mesh.Mesh.vectors`.
+    weighting : str
+        'area' for surface moments, 'volume' for solid moments or 'points' for the
+        triangle soup point covariance. Default is 'area'.
+    chunk_size : int
+        Number of triangles processed at once, which bounds temporary memory.
+    """
+    accumulator = MomentAccumulator(weighting)
+    for start in range(0, len(triangles), chunk_size):
+        accumulator.add(triangles[start:start + chunk_size])
+    return accumulator.result()
+
+
+def calculate_principal_axes_from_mesh(triangles, weighting='area', chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Calculate pitch, roll, yaw from the area- or volume-weighted inertia of a triangle mesh.
+
+    Unlike `calculate_principal_axes`, the result does not depend on the tessellation
+    density and no centered copy of the points is built.
+
+    Returns pitch, roll, yaw, centroid and the sorted principal axes.
+    """
+    centroid, covariance = mesh_moments(triangles, weighting, chunk_size)
+    pitch, roll, yaw, principal_axes = principal_axes_from_covariance(covariance)
+    return pitch, roll, yaw, centroid, principal_axes
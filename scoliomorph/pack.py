@@ -0,0 +1,236 @@
+import os
+import sys
+import json
+import argparse
+import numpy as np
+
+from .analysis import (list_stl_files, load_stl_triangles, deduplicate_vertices, principal_axes_from_covariances,
+                       assemble_profile, _result_entry)
+from .moments import mesh_moments
+from .results import VBCProfile
+
+PACK_EXTENSION = ".vbcpack"
+_MAGIC = b"VBCPACK\x00"
+_FORMAT_VERSION = 1
+_ALIGNMENT = 64
+# Precomputed moments per file, in this order along the second axis of the moments block
+MOMENT_KINDS = ("soup", "unique", "area", "volume")
+
+
+def is_spine_pack(path):
+    """Return True if `path` is a spine pack file."""
+    if not os.path.isfile(path):
+        return False
+    with open(path, "rb") as f:
+        return f.read(len(_MAGIC)) == _MAGIC
+
+
+def _moments(vertices, counts, triangles):
+    """(len(MOMENT_KINDS), 12) centroid and flattened covariance of one vertebra."""
+    vertices = vertices.astype(np.float64)
+    rows = []
+    for weights in (counts, None):
+        centroid = np.average(vertices, axis=0, weights=weights)
+        rows.append(np.concatenate([centroid, np.cov((vertices - centroid).T, fweights=weights).ravel()]))
+    for weighting in ("area", "volume"):
+        centroid, covariance = mesh_moments(triangles, weighting)
+        rows.append(np.concatenate([centroid, covariance.ravel()]))
+    return np.stack(rows)
+
+
+def build_spine_pack(folder_paths, output_path):
+    """
+    Convert the STL files of one or more spine folders into a single spine pack file.
+
+    Every file is parsed once; its deduplicated float32 vertices, uint32 faces (indices into
+    the file's own vertices), vertex multiplicities and precomputed moments (triangle soup,
+    unique vertices, area and volume) are written as 64-byte aligned blocks, followed by a
+    JSON index. `open_spine_pack` maps the file without parsing it.
+
+    Parameters:
+    folder_paths : str or list of str
+        A spine folder, or several for a cohort pack.
+    output_path : str
+        Path of the pack file, conventionally ending in '.vbcpack'.
+
+    Returns the path of the written file.
+    """
+    if isinstance(folder_paths, (str, os.PathLike)):
+        folder_paths = [folder_paths]
+    files, moments = [], []
+    temporary_path = output_path + ".tmp"
+    with open(temporary_path, "wb") as f:
+        # Magic and the offset of the JSON index, filled in at the end
+        f.write(_MAGIC + np.uint64(0).tobytes())
+
+        def write_block(array):
+            f.write(b"\0" * (-f.tell() % _ALIGNMENT))
+            offset = f.tell()
+            f.write(np.ascontiguousarray(array).tobytes())
+            return offset
+
+        for folder_path in folder_paths:
+            for filename in list_stl_files(folder_path):
+                filepath = os.path.join(folder_path, filename)
+                stat = os.stat(filepath)
+                triangles = load_stl_triangles(filepath)
+                vertices, faces, counts = deduplicate_vertices(triangles.reshape(-1, 3))
+                moments.append(_moments(vertices, counts, triangles))
+                files.append({
+                    "spine": str(folder_path),
+                    "filename": filename,
+                    "vertex_count": len(vertices),
+                    "face_count": len(faces),
+                    "vertices": write_block(vertices.astype(np.float32)),
+                    "faces": write_block(faces.astype(np.uint32)),
+                    "counts": write_block(counts.astype(np.uint32)),
+                    "source_size": stat.st_size,
+                    "source_mtime_ns": stat.st_mtime_ns,
+                })
+
+        moments_offset = write_block(np.asarray(moments, dtype=np.float64).reshape(-1, len(MOMENT_KINDS), 12))
+        header_offset = f.tell()
+        f.write(json.dumps({"version": _FORMAT_VERSION, "moment_kinds": MOMENT_KINDS,
+                            "moments": moments_offset, "files": files}).encode())
+        f.seek(len(_MAGIC))
+        f.write(np.uint64(header_offset).tobytes())
+    os.replace(temporary_path, output_path)
+    return output_path
+
+
+class SpinePack:
+    """
+    Read-only, memory-mapped view of a spine pack written by `build_spine_pack`.
+
+    Opening a pack only reads its JSON index; vertex, face and count arrays are views
+    into the mapped file, so their pages are read on first access and shared between
+    processes through the page cache. Files are addressed by position (0 .. len - 1).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._buffer = np.memmap(path, dtype=np.uint8, mode="r")
+        if bytes(self._buffer[:len(_MAGIC)]) != _MAGIC:
+            raise ValueError(f"{path} is not a spine pack file.")
+        header_offset = int(np.frombuffer(self._buffer, dtype=np.uint64, count=1, offset=len(_MAGIC))[0])
+        header = json.loads(bytes(self._buffer[header_offset:]).decode())
+        if header["version"] != _FORMAT_VERSION:
+            raise ValueError(f"Unsupported spine pack version {header['version']} in {path}.")
+        self.files = header["files"]
+        self.filenames = [item["filename"] for item in self.files]
+        self.spines = list(dict.fromkeys(item["spine"] for item in self.files))
+        self.moments = np.frombuffer(self._buffer, dtype=np.float64, count=len(self.files) * len(MOMENT_KINDS) * 12,
+                                     offset=header["moments"]).reshape(len(self.files), len(MOMENT_KINDS), 12)
+
+    def __len__(self):
+        return len(self.files)
+
+    def __repr__(self):
+        return f"SpinePack({self.path!r}, {len(self.spines)} spines, {len(self)} vertebrae)"
+
+    def _array(self, index, name, dtype, shape):
+        item = self.files[index]
+        count = int(np.prod(shape))
+        return np.frombuffer(self._buffer, dtype=dtype, count=count, offset=item[name]).reshape(shape)
+
+    def mesh(self, index):
+        """Return the (V, 3) float32 vertices and (F, 3) uint32 faces of a file, without copying."""
+        item = self.files[index]
+        return (self._array(index, "vertices", np.float32, (item["vertex_count"], 3)),
+                self._array(index, "faces", np.uint32, (item["face_count"], 3)))
+
+    def counts(self, index):
+        """Number of triangle corners at each vertex, i.e. the `return_counts` of `load_stl_file`."""
+        return self._array(index, "counts", np.uint32, (self.files[index]["vertex_count"],))
+
+    def load_points(self, index, mode='soup'):
+        """
+        Return the same points as `load_stl_file(filepath, mode)`.
+
+        'unique' is a view of the mapped vertices; 'soup' rebuilds the triangle soup (a copy).
+        """
+        vertices, faces = self.mesh(index)
+        if mode == 'unique':
+            return vertices
+        if mode == 'soup':
+            return vertices[faces].reshape(-1, 3)
+        raise ValueError(f"Unknown mode '{mode}'. Use 'soup' or 'unique'.")
+
+    def triangles(self, index):
+        """Return the (M, 3, 3) triangles, as `load_stl_triangles` (a copy)."""
+        vertices, faces = self.mesh(index)
+        return vertices[faces]
+
+    def indices(self, spine=None):
+        """Positions of the files of one spine (all files if `spine` is None)."""
+        return [index for index, item in enumerate(self.files) if spine is None or item["spine"] == spine]
+
+    def stale_files(self):
+        """Positions of files whose source STL changed or disappeared since the pack was built."""
+        stale = []
+        for index, item in enumerate(self.files):
+            try:
+                stat = os.stat(os.path.join(item["spine"], item["filename"]))
+            except OSError:
+                stale.append(index)
+                continue
+            if (stat.st_size, stat.st_mtime_ns) != (item["source_size"], item["source_mtime_ns"]):
+                stale.append(index)
+        return stale
+
+    def profile(self, spine=None, mode='soup', method='points', axis_anchor='global'):
+        """
+        Vertebral column profile from the precomputed moments, without touching the meshes.
+
+        With a `spine` only that spine's files are used; otherwise the profiles of all spines
+        are concatenated. `mode` and `method` are as for `calculate_vbc_profile`; 'robust' is
+        computed from the mapped vertices. All covariances are decomposed in one batched call.
+        """
+        spines = self.spines if spine is None else [spine]
+        profiles = []
+        for name in spines:
+            indices = self.indices(name)
+            if method == 'robust':
+                from .robust import calculate_principal_axes_robust
+                result = []
+                for index in indices:
+                    pitch, roll, yaw, centroid, principal_axes, _ = calculate_principal_axes_robust(
+                        self.load_points(index, mode), error_draws=0)
+                    result.append(_result_entry(self.filenames[index], pitch, roll, yaw, centroid, principal_axes))
+                profiles.append(assemble_profile(result, name, axis_anchor))
+                continue
+
+            if method == 'points':
+                if mode not in ('soup', 'unique'):
+                    raise ValueError(f"Unknown mode '{mode}'. Use 'soup' or 'unique'.")
+                kind = MOMENT_KINDS.index(mode)
+            elif method in ('area', 'volume'):
+                kind = MOMENT_KINDS.index(method)
+            else:
+                raise ValueError(f"Unknown method '{method}'. Use 'points', 'robust', 'area' or 'volume'.")
+            moments = self.moments[indices, kind]
+            pitch, roll, yaw, axes = principal_axes_from_covariances(moments[:, 3:].reshape(-1, 3, 3))
+            profile = VBCProfile([self.filenames[index] for index in indices], pitch, roll, yaw,
+                                 moments[:, :3], axes, spine=name)
+            profiles.append(assemble_profile(profile, name, axis_anchor))
+        return profiles[0] if len(profiles) == 1 else VBCProfile.concatenate(profiles)
+
+
+def open_spine_pack(path):
+    """Open a spine pack file for zero-copy reading, see `SpinePack`."""
+    return SpinePack(path)
+
+
+def main(argv=None):
+    """Command line interface: convert spine folders into a spine pack."""
+    parser = argparse.ArgumentParser(description="Convert STL spine folders into a memory-mappable spine pack.")
+    parser.add_argument("folders", nargs="+", help="Spine folders containing STL files.")
+    parser.add_argument("-o", "--output", required=True, help=f"Output file (e.g. spine{PACK_EXTENSION}).")
+    args = parser.parse_args(argv)
+    build_spine_pack(args.folders, args.output)
+    pack = open_spine_pack(args.output)
+    sys.stderr.write(f"{pack}: {os.path.getsize(args.output) / 2**20:.1f} MiB\n")
+
+
+if __name__ == "__main__":
+    main()
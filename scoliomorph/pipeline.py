@@ -0,0 +1,120 @@
+import os
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+from .analysis import list_stl_files, load_stl_triangles, process_triangles, assemble_profile
+
+
+class StageTimings:
+    """
+    Thread-safe accumulator of wall time per named stage.
+
+    Use `with timings.measure('load'):` around a stage; the seconds and call counts of
+    every stage are available from `seconds`, `counts` and `as_dict()`.
+    """
+
+    def __init__(self):
+        self.seconds = {}
+        self.counts = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def measure(self, stage):
+        """Add the wall time of the enclosed block to `stage`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start)
+
+    def add(self, stage, seconds, count=1):
+        """Add `seconds` to `stage`."""
+        with self._lock:
+            self.seconds[stage] = self.seconds.get(stage, 0.0) + seconds
+            self.counts[stage] = self.counts.get(stage, 0) + count
+
+    def as_dict(self):
+        """Return {stage: {'seconds': ..., 'count': ...}}."""
+        with self._lock:
+            return {stage: {"seconds": self.seconds[stage], "count": self.counts[stage]} for stage in self.seconds}
+
+    def __repr__(self):
+        return "StageTimings(" + ", ".join(f"{stage}={seconds:.3f}s" for stage, seconds in self.seconds.items()) + ")"
+
+
+def calculate_vbc_profile_pipelined(folder_path, prefetch=4, io_threads=2, mode='soup', method='points',
+                                    cache=None, axis_anchor='global', timings=None, component='all'):
+    """
+    Calculate the vertebral column profile while reading the next STL files in the background.
+
+    Up to `prefetch` files are read and parsed on `io_threads` background threads while the
+    current file is being decomposed. A new read is only started when a loaded mesh is
+    consumed, so at most `prefetch` meshes are held in memory besides the current one.
+    The result is identical to `calculate_vbc_profile` with the same options.
+
+    Parameters:
+    folder_path : str
+        Path to the folder containing STL files.
+    prefetch : int
+        Number of files read ahead. Default is 4.
+    io_threads : int
+        Number of background reader threads. Default is 2.
+    mode, method, cache, axis_anchor, component :
+        As for `calculate_vbc_profile`.
+    timings : StageTimings
+        If given, receives the time spent in the stages 'io' (reading and parsing, summed over
+        the reader threads), 'io_wait' (time the computation stalled waiting for a file) and
+        'compute'. A large 'io_wait' means the prefetch depth or thread count is too low for
+        the storage.
+    """
+    if timings is None:
+        timings = StageTimings()
+    filepaths = [os.path.join(folder_path, filename) for filename in list_stl_files(folder_path)]
+    options = dict(mode=mode, method=method, chunk_size=None, component=component)
+
+    # Cached files need no reading at all
+    cached = {}
+    if cache is not None:
+        for filepath in filepaths:
+            entry = cache.get(filepath, **options)
+            if entry is not None:
+                cached[filepath] = entry
+    to_load = iter([filepath for filepath in filepaths if filepath not in cached])
+
+    def load(filepath):
+        with timings.measure("io"):
+            return load_stl_triangles(filepath)
+
+    result = []
+    with ThreadPoolExecutor(max_workers=io_threads) as executor:
+        pending = deque()
+
+        def submit_next():
+            filepath = next(to_load, None)
+            if filepath is not None:
+                pending.append((filepath, executor.submit(load, filepath)))
+
+        for _ in range(max(prefetch, 1)):
+            submit_next()
+
+        for filepath in filepaths:
+            if filepath in cached:
+                result.append(cached[filepath])
+                continue
+
+            loaded_filepath, future = pending.popleft()
+            with timings.measure("io_wait"):
+                triangles = future.result()
+            submit_next()
+
+            with timings.measure("compute"):
+                entry = process_triangles(triangles, os.path.basename(loaded_filepath), mode, method, component)
+            del triangles
+            if cache is not None:
+                cache.put(loaded_filepath, entry, **options)
+            result.append(entry)
+
+    return assemble_profile(result, folder_path, axis_anchor)
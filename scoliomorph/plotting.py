@@ -0,0 +1,303 @@
+import os
+import numpy as np
+import matplotlib.pyplot as plt
+
+from .analysis import list_stl_files
+from .results import VBCProfile
+
+
+def plot_2d_angles_with_labels(pitch, roll, yaw, principal_axes, centered_points):
+    """Plot the pitch, roll, yaw along with the point cloud projections."""
+    fig, axs = plt.subplots(1, 3, figsize=(15, 5))
+    
+    scale = 50
+
+    # Plot Pitch (YZ-plane projection)
+    axs[0].scatter(centered_points[:, 1], centered_points[:, 2], s=1, color='gray', alpha=0.5)  # Projection on YZ-plane
+    axs[0].plot([-scale, scale], [0, 0], color='r', linewidth=1, label='Global Z Axis')
+    # Plot the Pitch Axis in both positive and negative directions in one line
+    axs[0].plot([0, principal_axes[1, 0] * scale, -principal_axes[1, 0] * scale],
+            [0, principal_axes[2, 0] * scale, -principal_axes[2, 0] * scale],
+            color='r', linestyle='--', linewidth=0.75, label='Pitch Axis')
+    axs[0].set_xlim(-scale, scale)
+    axs[0].set_ylim(-scale, scale)
+    axs[0].set_title(f'Pitch: {pitch:.2f}° (YZ-plane)')
+    axs[0].set_xlabel('Z-axis')
+    axs[0].set_ylabel('Y-axis')
+    axs[0].legend()
+
+    # Add angle label for pitch
+    # axs[0].text(principal_axes[1, 0] * scale / 2, principal_axes[2, 0] * scale / 2, f'{pitch:.2f}°', color='r')
+
+    # Plot Roll (XZ-plane projection)
+    axs[1].scatter(centered_points[:, 0], centered_points[:, 2], s=1, color='gray', alpha=0.5)  # Projection on XZ-plane
+    axs[1].plot([-scale, scale], [0, 0], color='g', linewidth=1, label='Global X Axis')
+    # Plot the Roll Axis in both positive and negative directions in one line
+    axs[1].plot([0, principal_axes[0, 1] * scale, -principal_axes[0, 1] * scale], 
+            [0, principal_axes[2, 1] * scale, -principal_axes[2, 1] * scale],
+            color='g', linestyle='--', linewidth=0.75, label='Roll Axis')
+    axs[1].set_xlim(-scale, scale)
+    axs[1].set_ylim(-scale, scale)
+    axs[1].set_title(f'Roll: {roll:.2f}° (XZ-plane)')
+    axs[1].set_xlabel('X-axis')
+    axs[1].set_ylabel('Z-axis')
+    axs[1].legend()
+
+    # Add angle label for roll
+    # axs[1].text(principal_axes[0, 1] * scale / 2, principal_axes[2, 1] * scale / 2, f'{roll:.2f}°', color='g')
+
+    # Plot Yaw (XY-plane projection)
+    axs[2].scatter(centered_points[:, 0], centered_points[:, 1], s=1, color='gray', alpha=0.5)  # Projection on XY-plane
+    axs[2].plot([-scale, scale], [0, 0], color='b', linewidth=1, label='Global X Axis')
+    # Plot the Yaw Axis in both positive and negative directions in one line
+    axs[2].plot([0, principal_axes[0, 2] * scale, -principal_axes[0, 2] * scale], 
+            [0, principal_axes[1, 2] * scale, -principal_axes[1, 2] * scale],
+            color='b', linestyle='--', linewidth=0.75, label='Yaw Axis')
+    axs[2].set_xlim(-scale, scale)
+    axs[2].set_ylim(-scale, scale)
+    axs[2].set_title(f'Yaw: {yaw:.2f}° (XY-plane)')
+    axs[2].set_xlabel('X-axis')
+    axs[2].set_ylabel('Y-axis')
+    axs[2].legend()
+
+    # Add angle label for yaw
+    # axs[2].text(principal_axes[0, 2] * scale / 2, principal_axes[1, 2] * scale / 2, f'{yaw:.2f}°', color='b')
+
+    # Show the 2D plot
+    plt.tight_layout()
+    plt.show()
+    
+
+# Function to plot point cloud and principal axes with fixed global coordinate system and angular lines
+def plot_point_cloud_fixed_axes(centered_points, principal_axes, pitch, roll, yaw):
+    """ Plot the point cloud with fixed global coordinate system and angular lines."""
+    fig = plt.figure()
+    ax = fig.add_subplot(111, projection='3d')
+    
+    # Adjust points by centroid shift to simulate stacking
+    # adjusted_points = centered_points + prev_centroid_shift
+    # If you want to disable stacking correction, comment the line above and uncomment the line below
+    adjusted_points = centered_points
+    
+    # Plot points
+    ax.scatter(adjusted_points[:, 0], adjusted_points[:, 1], adjusted_points[:, 2], s=1, color='gray', alpha=0.5)
+    
+    # Define the scale of the axes
+    scale = 50
+    
+    # Plot global X, Y, Z axes for reference (fixed global coordinate system)
+    ax.quiver(0, 0, 0, scale, 0, 0, color='r', label='Global X Axis')
+    ax.quiver(0, 0, 0, 0, scale, 0, color='g', label='Global Y Axis')
+    ax.quiver(0, 0, 0, 0, 0, scale, color='b', label='Global Z Axis')
+
+    # Plot lines to show angular rotation relative to the global axes
+    # Red line for X-axis
+    ax.plot([0, principal_axes[0, 0] * scale], [0, principal_axes[1, 0] * scale], [0, principal_axes[2, 0] * scale], 
+            color='r', linestyle='--', linewidth=0.8, label='Pitch Angle')
+
+    # Green line for Y-axis
+    ax.plot([0, principal_axes[0, 1] * scale], [0, principal_axes[1, 1] * scale], [0, principal_axes[2, 1] * scale], 
+            color='g', linestyle='--', linewidth=0.8, label='Roll Angle')
+
+    # Blue line for Z-axis
+    ax.plot([0, principal_axes[0, 2] * scale], [0, principal_axes[1, 2] * scale], [0, principal_axes[2, 2] * scale], 
+            color='b', linestyle='--', linewidth=0.8, label='Yaw Angle')
+
+    # Show the angles in a consistent reference frame
+    ax.text2D(0.05, 0.95, f'Pitch: {pitch:.2f}°\nRoll: {roll:.2f}°\nYaw: {yaw:.2f}°', transform=ax.transAxes)
+    
+    # Set labels and fixed view
+    ax.set_xlabel('X')
+    ax.set_ylabel('Y')
+    ax.set_zlabel('Z')
+    ax.view_init(elev=20, azim=30)  # Fix view for consistency across plots
+    
+    # Show plot
+    plt.show()
+    
+
+def plot_stl_files(folder_path, plot_type='pointcloud', color='blue', alpha=1.0, max_faces=None, max_points=None):
+    """
+    Function to load STL files from a folder, align points to (x, y) = (0, 0), and plot them.
+    
+    Parameters:
+    folder_path : str
+        Path to the folder containing STL files.
+    plot_type : str
+        Type of plot ('pointcloud' or 'mesh'). Default is 'pointcloud'.
+    color : str
+        Color for the plot (e.g., 'red', 'blue'). Default is 'blue'.
+    alpha : float
+        Transparency level for the plot (0.0 to 1.0). Default is 1.0 (opaque).
+    max_faces : int
+        Decimate each mesh to at most this many faces ('mesh' plots). Default is None.
+    max_points : int
+        Reduce each point cloud to at most this many points ('pointcloud' plots). Default is None.
+
+    With `max_faces` or `max_points`, the fast path is used: each file is loaded once with
+    numpy-stl, reduced by voxel-grid clustering (cached in memory) and all vertebrae are
+    drawn with a single collection instead of one artist per file. `folder_path` may also
+    be a spine pack (see `scoliomorph.pack`), whose meshes are then read zero-copy and
+    always drawn this way.
+    """
+    from .pack import is_spine_pack
+    if is_spine_pack(folder_path):
+        return _plot_spine_pack(folder_path, plot_type, color, alpha, max_faces, max_points)
+    if max_faces is not None or max_points is not None:
+        return _plot_stl_files_decimated(folder_path, plot_type, color, alpha, max_faces, max_points)
+
+    # trimesh is only needed on this path and is slow to import
+    import trimesh
+
+    # Set up the 3D plot
+    fig = plt.figure()
+    ax = fig.add_subplot(111, projection='3d')
+
+    # Iterate through all STL files in the folder
+    for filename in os.listdir(folder_path):
+        if filename.endswith(".stl"):
+            file_path = os.path.join(folder_path, filename)
+            print(f"Processing file: {filename}")
+            
+            # Load the STL file
+            mesh = trimesh.load(file_path)
+
+            # Get the vertices (points)
+            vertices = mesh.vertices
+
+            # Calculate centroid and shift points so that the centroid is at (x=0, y=0)
+            centroid = np.mean(vertices, axis=0)
+            aligned_vertices = vertices - [centroid[0], centroid[1], 0]  # Only adjust x, y
+            
+            # Plot based on the chosen plot type
+            if plot_type == 'pointcloud':
+                ax.scatter(aligned_vertices[:, 0], aligned_vertices[:, 1], aligned_vertices[:, 2], 
+                           color=color, alpha=alpha, label=filename)
+            elif plot_type == 'mesh':
+                faces = mesh.faces
+                ax.plot_trisurf(aligned_vertices[:, 0], aligned_vertices[:, 1], aligned_vertices[:, 2], 
+                                triangles=faces, color=color, alpha=alpha, label=filename)
+    
+    # Add labels and legend
+    ax.set_xlabel('X axis')
+    ax.set_ylabel('Y axis')
+    ax.set_zlabel('Z axis')
+    plt.title('Aligned STL Files')
+    # plt.legend() # Uncomment to show legend
+    # Set equal aspect ratio for 3D plot
+    set_axes_equal(ax)
+    plt.show()
+
+
+def _plot_stl_files_decimated(folder_path, plot_type, color, alpha, max_faces, max_points):
+    """Fast path of `plot_stl_files`: decimated geometry of all files in one draw call."""
+    from .decimation import load_decimated_mesh
+
+    if plot_type == 'mesh' and max_faces is None:
+        raise ValueError("plot_type='mesh' needs max_faces for the decimated rendering path.")
+
+    geometry = []
+    for filename in list_stl_files(folder_path):
+        print(f"Processing file: {filename}")
+        file_path = os.path.join(folder_path, filename)
+        if plot_type == 'pointcloud':
+            vertices, faces = load_decimated_mesh(file_path, max_points=max_points or max_faces)
+        else:
+            vertices, faces = load_decimated_mesh(file_path, max_faces=max_faces)
+
+        geometry.append(_aligned_geometry(vertices, faces))
+    _draw_aligned_geometry(geometry, plot_type, color, alpha)
+
+
+def _plot_spine_pack(pack_path, plot_type, color, alpha, max_faces, max_points):
+    """Draw the meshes of a spine pack in one draw call, reduced to the budget if one is given."""
+    from .pack import open_spine_pack
+    from .decimation import decimate_mesh, downsample_points
+
+    pack = open_spine_pack(pack_path)
+    geometry = []
+    for index in range(len(pack)):
+        vertices, faces = pack.mesh(index)
+        if plot_type == 'pointcloud':
+            budget = max_points or max_faces
+            vertices, faces = (vertices if budget is None else downsample_points(vertices, budget)), None
+        elif max_faces is not None:
+            vertices, faces = decimate_mesh(vertices, faces, max_faces)
+        geometry.append(_aligned_geometry(vertices, faces))
+    _draw_aligned_geometry(geometry, plot_type, color, alpha)
+
+
+def _aligned_geometry(vertices, faces):
+    """Points (faces None) or (F, 3, 3) triangles of one vertebra, shifted so the centroid is at (x=0, y=0)."""
+    centroid = np.mean(vertices, axis=0)
+    aligned_vertices = vertices - [centroid[0], centroid[1], 0]
+    return aligned_vertices if faces is None else aligned_vertices[faces]
+
+
+def _draw_aligned_geometry(geometry, plot_type, color, alpha):
+    """Draw the geometry of all vertebrae as one scatter or one polygon collection."""
+    from mpl_toolkits.mplot3d.art3d import Poly3DCollection
+
+    fig = plt.figure()
+    ax = fig.add_subplot(111, projection='3d')
+    geometry = np.concatenate(geometry)
+    if plot_type == 'pointcloud':
+        ax.scatter(geometry[:, 0], geometry[:, 1], geometry[:, 2], color=color, alpha=alpha, s=1)
+    elif plot_type == 'mesh':
+        ax.add_collection3d(Poly3DCollection(geometry, facecolor=color, alpha=alpha, linewidth=0))
+        corners = geometry.reshape(-1, 3)
+        ax.auto_scale_xyz(corners[:, 0], corners[:, 1], corners[:, 2])
+
+    ax.set_xlabel('X axis')
+    ax.set_ylabel('Y axis')
+    ax.set_zlabel('Z axis')
+    plt.title('Aligned STL Files')
+    set_axes_equal(ax)
+    plt.show()
+
+    
+# Function to plot stacked points with vectors showing angles
+def plot_vbc_profile(result):
+    """Plot the point cloud centroids of the vertebral column units with pitch, roll, and yaw vectors"""
+    result = VBCProfile.from_entries(result)
+    fig = plt.figure()
+    ax = fig.add_subplot(111, projection='3d')
+
+    scale = 30  # Length of the vector for visualizing the axes
+    centroids = result.centroids
+
+    # Plot all centroids as points
+    ax.scatter(centroids[:, 0], centroids[:, 1], centroids[:, 2], color='black', s=20)
+
+    # Plot the principal axes (showing pitch, roll, yaw) as vectors, one call per axis and direction
+    for column, color, name in ((0, 'r', 'Pitch'), (1, 'g', 'Roll'), (2, 'b', 'Yaw')):
+        vectors = result.axes[:, :, column] * scale
+        ax.quiver(centroids[:, 0], centroids[:, 1], centroids[:, 2],
+                  vectors[:, 0], vectors[:, 1], vectors[:, 2],
+                  color=color, label=f'{name} Axis (Positive)')
+        ax.quiver(centroids[:, 0], centroids[:, 1], centroids[:, 2],
+                  -vectors[:, 0], -vectors[:, 1], -vectors[:, 2],
+                  color=color, linestyle='--', label=f'{name} Axis (Negative)')
+
+    ax.set_xlabel('X-axis')
+    ax.set_ylabel('Y-axis')
+    ax.set_zlabel('Z-axis')
+    plt.title('Stacked Point Clouds with Pitch, Roll, Yaw Vectors')
+
+    # Set equal aspect ratio for 3D plot
+    set_axes_equal(ax)
+
+    plt.show()
+
+
+def set_axes_equal(ax):
+    """Set 3D plot axes to equal scale."""
+    limits = np.array([ax.get_xlim3d(), ax.get_ylim3d(), ax.get_zlim3d()])
+    spans = np.abs(limits[:, 1] - limits[:, 0])
+    centers = np.mean(limits, axis=1)
+    max_span = max(spans)
+    
+    # Set the axis limits to be centered and proportional
+    ax.set_xlim3d([centers[0] - max_span / 2, centers[0] + max_span / 2])
+    ax.set_ylim3d([centers[1] - max_span / 2, centers[1] + max_span / 2])
+    ax.set_zlim3d([centers[2] - max_span / 2, centers[2] + max_span / 2])
@@ -0,0 +1,171 @@
+import io
+import os
+import time
+import pstats
+import cProfile
+import tracemalloc
+from contextlib import contextmanager
+import numpy as np
+
+from .analysis import (list_stl_files, load_stl_triangles, deduplicate_vertices, calculate_principal_axes,
+                       angles_from_axes, normalize_angles, assemble_profile, _result_entry)
+from .pipeline import StageTimings
+
+
+class StageProfiler:
+    """
+    Per-stage wall time with optional cProfile statistics and tracemalloc peaks.
+
+    Use `with profiler.stage('load'):` around each stage. Wall times are kept in a
+    `StageTimings`; with `cprofile` every stage gets its own `cProfile.Profile` that is
+    only enabled inside that stage, and with `trace_memory` the peak traced allocation
+    above the level at stage entry is recorded. Both add overhead, so measure wall time
+    in a separate run.
+    """
+
+    def __init__(self, cprofile=False, trace_memory=False):
+        self.timings = StageTimings()
+        self.cprofile = cprofile
+        self.trace_memory = trace_memory
+        self.profiles = {}
+        self.peak_bytes = {}
+
+    @contextmanager
+    def stage(self, name):
+        """Measure the enclosed block as stage `name`."""
+        profile = None
+        if self.cprofile:
+            profile = self.profiles.setdefault(name, cProfile.Profile())
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        if profile is not None:
+            profile.enable()
+        try:
+            yield
+        finally:
+            if profile is not None:
+                profile.disable()
+            self.timings.add(name, time.perf_counter() - start)
+            if self.trace_memory:
+                peak = tracemalloc.get_traced_memory()[1] - baseline
+                self.peak_bytes[name] = max(self.peak_bytes.get(name, 0), peak)
+
+    def stats(self, name, limit=15, sort='cumulative'):
+        """Return the cProfile report of one stage as text."""
+        stream = io.StringIO()
+        pstats.Stats(self.profiles[name], stream=stream).sort_stats(sort).print_stats(limit)
+        return stream.getvalue()
+
+    def report(self):
+        """Return {stage: {'seconds', 'count'[, 'peak_bytes']}}."""
+        report = self.timings.as_dict()
+        for name, peak in self.peak_bytes.items():
+            report[name]["peak_bytes"] = peak
+        return report
+
+    def close(self):
+        """Stop tracemalloc if it is running."""
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+def profile_vbc_profile(folder_path, mode='soup', profiler=None):
+    """
+    Run `calculate_vbc_profile` (method='points') split into measured stages.
+
+    The stages are 'load' (STL parsing), 'vertices' (soup or deduplication, see `mode`),
+    'principal_axes' (covariance and eigen-decomposition), 'normalize_angles' and
+    'assemble'. The profile is identical to `calculate_vbc_profile(folder_path, mode)`.
+
+    Returns the `VBCProfile` and the `StageProfiler` (a plain one if none is given).
+    """
+    if profiler is None:
+        profiler = StageProfiler()
+    result = []
+    for filename in list_stl_files(folder_path):
+        with profiler.stage("load"):
+            triangles = load_stl_triangles(os.path.join(folder_path, filename))
+        with profiler.stage("vertices"):
+            points = triangles.reshape(-1, 3)
+            if mode == 'unique':
+                points = deduplicate_vertices(points)[0]
+        with profiler.stage("principal_axes"):
+            _, _, _, centroid, _, principal_axes = calculate_principal_axes(points)
+            raw_angles = angles_from_axes(principal_axes, normalize=False)
+        with profiler.stage("normalize_angles"):
+            pitch, roll, yaw = (normalize_angles(angle) for angle in raw_angles)
+        result.append(_result_entry(filename, pitch, roll, yaw, centroid, principal_axes))
+    with profiler.stage("assemble"):
+        profile = assemble_profile(result, folder_path)
+    return profile, profiler
+
+
+def synthetic_vertebra(n_faces, radii=(22.0, 16.0, 12.0), rotation=None, center=(0.0, 0.0, 0.0), noise=0.0,
+                       seed=0):
+    """
+    Closed ellipsoidal triangle mesh with about `n_faces` faces, as (M, 3, 3) float32 triangles.
+
+    A UV sphere with pole caps (no degenerate triangles) is scaled to `radii`, rotated by the
+    (3, 3) `rotation`, jittered by Gaussian `noise` and moved to `center`. Used to benchmark
+    how the pipeline scales with tessellation density.
+    """
+    rng = np.random.default_rng(seed)
+    n_lat = max(int(round(np.sqrt(n_faces / 4))) + 1, 3)
+    n_lon = 2 * (n_lat - 1)
+    theta = np.pi * np.arange(1, n_lat) / n_lat
+    phi = 2 * np.pi * np.arange(n_lon) / n_lon
+    rings = np.stack([np.outer(np.sin(theta), np.cos(phi)), np.outer(np.sin(theta), np.sin(phi)),
+                      np.repeat(np.cos(theta)[:, None], n_lon, axis=1)], axis=-1).reshape(-1, 3)
+    vertices = np.concatenate([[[0, 0, 1]], rings, [[0, 0, -1]]]) * np.asarray(radii)
+    if noise:
+        vertices += rng.normal(0, noise, vertices.shape)
+    if rotation is not None:
+        vertices = vertices @ np.asarray(rotation).T
+    vertices += np.asarray(center)
+
+    # Ring r, longitude j has index 1 + r * n_lon + j
+    j = np.arange(n_lon)
+    following = (j + 1) % n_lon
+    bottom = len(vertices) - 1
+    top_cap = np.stack([np.zeros(n_lon, dtype=int), 1 + j, 1 + following], axis=1)
+    ring = np.arange(n_lat - 2)[:, None] * n_lon
+    upper, lower = 1 + ring + j, 1 + ring + n_lon + j
+    upper_next, lower_next = 1 + ring + following, 1 + ring + n_lon + following
+    bands = np.concatenate([np.stack([upper, lower, lower_next], axis=-1).reshape(-1, 3),
+                            np.stack([upper, lower_next, upper_next], axis=-1).reshape(-1, 3)])
+    last = 1 + (n_lat - 2) * n_lon
+    bottom_cap = np.stack([np.full(n_lon, bottom), last + following, last + j], axis=1)
+    faces = np.concatenate([top_cap, bands, bottom_cap])
+    return vertices[faces].astype(np.float32)
+
+
+def write_synthetic_spine(folder_path, n_levels=17, n_faces=20000, seed=0):
+    """
+    Write `n_levels` randomly oriented synthetic vertebrae as binary STL files into a folder.
+
+    Levels are stacked 30 mm apart along Z with small random tilts. Returns the file paths.
+    """
+    from stl import mesh, Mode
+
+    os.makedirs(folder_path, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    paths = []
+    for level in range(n_levels):
+        # Random small rotation from a random axis and angle (Rodrigues' formula)
+        axis = rng.normal(size=3)
+        axis /= np.linalg.norm(axis)
+        angle = np.radians(rng.uniform(-20, 20))
+        cross = np.array([[0, -axis[2], axis[1]], [axis[2], 0, -axis[0]], [-axis[1], axis[0], 0]])
+        rotation = np.eye(3) + np.sin(angle) * cross + (1 - np.cos(angle)) * cross @ cross
+        center = (rng.normal(0, 3), rng.normal(0, 3), 30.0 * level)
+        triangles = synthetic_vertebra(n_faces, rotation=rotation, center=center, noise=0.05, seed=seed + level)
+        stl_mesh = mesh.Mesh(np.zeros(len(triangles), dtype=mesh.Mesh.dtype))
+        stl_mesh.vectors[:] = triangles
+        path = os.path.join(folder_path, f"{level:02d}_synthetic vertebra.stl")
+        stl_mesh.save(path, mode=Mode.BINARY)
+        paths.append(path)
+    return paths
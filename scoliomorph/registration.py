@@ -0,0 +1,195 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+from .analysis import list_stl_files, load_stl_file, calculate_principal_axes, angles_from_axes, normalize_angles
+from .modelling import rotation_angle
+from .results import level_from_filename
+
+# Sign flips of the first two principal axes that keep a right-handed frame
+_AXIS_FLIPS = np.array([np.diag(signs) for signs in ((1, 1, 1), (-1, -1, 1), (-1, 1, -1), (1, -1, -1))], dtype=float)
+
+
+def _kdtree(points):
+    """Nearest-neighbour index of a point cloud (scipy's cKDTree)."""
+    try:
+        from scipy.spatial import cKDTree
+    except ImportError as error:
+        raise ImportError("registration requires scipy: pip install scoliomorph[registration]") from error
+    return cKDTree(points)
+
+
+def _subsample(points, max_points, rng):
+    """At most `max_points` rows of `points`, drawn uniformly without replacement."""
+    if len(points) <= max_points:
+        return points
+    return points[rng.choice(len(points), size=max_points, replace=False)]
+
+
+def rigid_transform(source, target):
+    """
+    Least-squares rotation and translation mapping paired `source` points onto `target` points.
+
+    Kabsch's method: SVD of the cross-covariance, with the sign of the last singular vector
+    fixed so the result is a rotation, not a reflection. Returns R (3, 3) and t (3,) such
+    that target ≈ source @ R.T + t.
+    """
+    source_mean, target_mean = source.mean(axis=0), target.mean(axis=0)
+    u, _, vt = np.linalg.svd((source - source_mean).T @ (target - target_mean))
+    correction = np.diag([1.0, 1.0, np.sign(np.linalg.det(vt.T @ u.T))])
+    rotation = vt.T @ correction @ u.T
+    return rotation, target_mean - rotation @ source_mean
+
+
+def _initial_transforms(source, target):
+    """(5, 3, 3) rotations and (5, 3) translations: identity and the four PCA axis alignments."""
+    source_axes = calculate_principal_axes(source)[5]
+    target_axes = calculate_principal_axes(target)[5]
+    rotations = np.concatenate([np.eye(3)[None], target_axes @ _AXIS_FLIPS @ source_axes.T])
+    source_centroid, target_centroid = source.mean(axis=0), target.mean(axis=0)
+    return rotations, target_centroid - rotations @ source_centroid
+
+
+def icp(source, target, max_points=5000, max_iterations=50, tolerance=1e-5, reject=3.0, seed=0, tree=None):
+    """
+    Rigidly align the `source` point cloud to the `target` with the iterative closest point method.
+
+    Both clouds are subsampled to `max_points` (the target to four times as many, as the
+    nearest-neighbour reference). The start is the best of the identity and the four
+    sign-consistent principal axis alignments, scored by their mean nearest-neighbour
+    distance in one batched query. Each iteration matches every source point to its
+    nearest target point with a KD-tree, drops pairs further than `reject` times the
+    median distance, and solves the rigid transform in closed form. Iterations stop once
+    the RMS distance changes by less than `tolerance` (in the units of the points).
+
+    Returns a dict with 'rotation' (3, 3), 'translation' (3,), 'rmse', 'iterations' and
+    'converged'; target ≈ source @ rotation.T + translation.
+    """
+    rng = np.random.default_rng(seed)
+    source = _subsample(np.asarray(source, dtype=np.float64), max_points, rng)
+    target = _subsample(np.asarray(target, dtype=np.float64), 4 * max_points, rng)
+    if tree is None:
+        tree = _kdtree(target)
+
+    rotations, translations = _initial_transforms(source, target)
+    candidates = np.einsum('kij,nj->kni', rotations, source) + translations[:, None, :]
+    distances = tree.query(candidates.reshape(-1, 3))[0].reshape(len(rotations), -1)
+    best = np.argmin(distances.mean(axis=1))
+    rotation, translation = rotations[best], translations[best]
+
+    previous_error = np.inf
+    converged = False
+    for iteration in range(1, max_iterations + 1):
+        moved = source @ rotation.T + translation
+        distance, index = tree.query(moved)
+        keep = distance <= reject * max(np.median(distance), 1e-12)
+        step_rotation, step_translation = rigid_transform(moved[keep], target[index[keep]])
+        rotation = step_rotation @ rotation
+        translation = step_rotation @ translation + step_translation
+        error = np.sqrt(np.mean(distance[keep] ** 2))
+        if abs(previous_error - error) < tolerance:
+            converged = True
+            break
+        previous_error = error
+
+    return {"rotation": rotation, "translation": translation, "rmse": error,
+            "iterations": iteration, "converged": converged}
+
+
+def orientation_change(rotation, baseline_axes):
+    """
+    Pitch, roll and yaw change of a vertebra rotated by `rotation` from its baseline axes.
+
+    The follow-up axes are the baseline principal axes carried along by the registration,
+    so they do not depend on a second, possibly unstable, eigen-decomposition. `rotation`
+    and `baseline_axes` may be (3, 3) or (N, 3, 3). Returns the deltas in degrees,
+    wrapped to [-90°, 90°].
+    """
+    before = np.stack(angles_from_axes(baseline_axes), axis=-1)
+    after = np.stack(angles_from_axes(np.asarray(rotation) @ baseline_axes), axis=-1)
+    return normalize_angles(after - before)
+
+
+def register_vertebra(baseline, followup, **options):
+    """
+    Register a follow-up vertebra to its baseline and return the change in orientation.
+
+    `baseline` and `followup` are STL paths or (N, 3) point clouds; `options` are passed to
+    `icp`. Returns the `icp` result (follow-up ≈ rotation @ baseline + translation) with
+    'delta_pitch', 'delta_roll', 'delta_yaw' and the total 'rotation_angle' in degrees.
+    """
+    if isinstance(baseline, (str, os.PathLike)):
+        baseline = load_stl_file(baseline, mode='unique')
+    if isinstance(followup, (str, os.PathLike)):
+        followup = load_stl_file(followup, mode='unique')
+    result = icp(baseline, followup, **options)
+    baseline_axes = calculate_principal_axes(baseline)[5]
+    result["delta_pitch"], result["delta_roll"], result["delta_yaw"] = orientation_change(
+        result["rotation"], baseline_axes)
+    result["rotation_angle"] = rotation_angle(result["rotation"])
+    return result
+
+
+def match_levels(baseline_folder, followup_folder):
+    """
+    Pair the STL files of two visits of the same spine.
+
+    Files are paired by vertebral level label (e.g. 'T12') when every file has one, and by
+    position in the sorted file lists otherwise. Returns a list of (level, baseline file,
+    follow-up file); levels present in only one visit are left out.
+    """
+    baseline_files, followup_files = list_stl_files(baseline_folder), list_stl_files(followup_folder)
+    baseline_levels = [level_from_filename(filename) for filename in baseline_files]
+    followup_levels = [level_from_filename(filename) for filename in followup_files]
+    if all(baseline_levels) and all(followup_levels):
+        followup_by_level = dict(zip(followup_levels, followup_files))
+        return [(level, filename, followup_by_level[level])
+                for level, filename in zip(baseline_levels, baseline_files) if level in followup_by_level]
+    if len(baseline_files) != len(followup_files):
+        raise ValueError(f"Cannot pair {len(baseline_files)} baseline with {len(followup_files)} follow-up "
+                         "files without vertebral level labels in the file names.")
+    return [(str(position), baseline, followup)
+            for position, (baseline, followup) in enumerate(zip(baseline_files, followup_files))]
+
+
+def register_spines(baseline_folder, followup_folder, n_jobs=None, **options):
+    """
+    Register every vertebra of a follow-up scan to the baseline scan, levels in parallel.
+
+    Parameters:
+    baseline_folder, followup_folder : str
+        Spine folders of the two visits, paired with `match_levels`.
+    n_jobs : int
+        Number of worker processes. Default is None (one per CPU core); 1 runs serially.
+    options :
+        Passed to `icp`, e.g. `max_points` or `tolerance`.
+
+    Returns a dict with the paired 'levels', 'baseline_files' and 'followup_files', the
+    (N, 3, 3) 'rotations' and (N, 3) 'translations', and (N,) arrays 'delta_pitch',
+    'delta_roll', 'delta_yaw', 'rotation_angle', 'rmse', 'iterations' and 'converged'.
+    """
+    pairs = match_levels(baseline_folder, followup_folder)
+    baseline_paths = [os.path.join(baseline_folder, baseline) for _, baseline, _ in pairs]
+    followup_paths = [os.path.join(followup_folder, followup) for _, _, followup in pairs]
+    arguments = (baseline_paths, followup_paths, [options] * len(pairs))
+    if n_jobs == 1:
+        results = list(map(_register_files, *arguments))
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            results = list(executor.map(_register_files, *arguments))
+
+    keys = ("delta_pitch", "delta_roll", "delta_yaw", "rotation_angle", "rmse", "iterations", "converged")
+    summary = {
+        "levels": [level for level, _, _ in pairs],
+        "baseline_files": [baseline for _, baseline, _ in pairs],
+        "followup_files": [followup for _, _, followup in pairs],
+        "rotations": np.array([result["rotation"] for result in results]).reshape(-1, 3, 3),
+        "translations": np.array([result["translation"] for result in results]).reshape(-1, 3),
+    }
+    summary.update({key: np.array([result[key] for result in results]) for key in keys})
+    return summary
+
+
+def _register_files(baseline_path, followup_path, options):
+    """Worker of `register_spines` (module level so it can be pickled)."""
+    return register_vertebra(baseline_path, followup_path, **options)
@@ -0,0 +1,193 @@
+import os
+import re
+import numpy as np
+
+# Vertebral level label in a file name, e.g. 'L3' in '01_CTACardio segmentation_L3 vertebra.stl'
+_LEVEL_PATTERN = re.compile(r"(?<![A-Za-z0-9])([CTLS][0-9]{1,2})(?![0-9])")
+
+_FIELDS = ("spine", "filenames", "levels", "pitch", "roll", "yaw", "centroids", "axes")
+
+
+def level_from_filename(filename):
+    """Return the vertebral level label (e.g. 'T12') found in a file name, or '' if there is none."""
+    match = _LEVEL_PATTERN.search(os.path.basename(filename))
+    return match.group(1) if match else ""
+
+
+class VBCProfile:
+    """
+    Columnar, array-backed vertebral column profile.
+
+    Holds one row per vertebra in contiguous arrays: `pitch`, `roll`, `yaw` (N,),
+    `centroids` (N, 3) and principal `axes` (N, 3, 3), with `filenames`, `levels`
+    and `spine` labels. Iterating or indexing with an integer yields the same dicts
+    as the former list-of-dicts result, so existing callers keep working; indexing
+    with a slice, mask or index array returns a new profile.
+    """
+
+    __slots__ = _FIELDS
+
+    def __init__(self, filenames, pitch, roll, yaw, centroids, axes, levels=None, spine=None):
+        self.filenames = np.asarray(filenames, dtype=str)
+        n = len(self.filenames)
+        self.pitch = np.asarray(pitch, dtype=np.float64).reshape(n)
+        self.roll = np.asarray(roll, dtype=np.float64).reshape(n)
+        self.yaw = np.asarray(yaw, dtype=np.float64).reshape(n)
+        self.centroids = np.asarray(centroids, dtype=np.float64).reshape(n, 3)
+        self.axes = np.asarray(axes, dtype=np.float64).reshape(n, 3, 3)
+        if levels is None:
+            levels = [level_from_filename(filename) for filename in self.filenames]
+        self.levels = np.asarray(levels, dtype=str).reshape(n)
+        if spine is None or np.ndim(spine) == 0:
+            spine = np.full(n, "" if spine is None else spine)
+        self.spine = np.asarray(spine, dtype=str).reshape(n)
+
+    @classmethod
+    def from_entries(cls, entries, spine=None):
+        """Build a profile from result entries as returned by `process_stl_file`."""
+        if isinstance(entries, cls):
+            return entries
+        entries = list(entries)
+        return cls(
+            filenames=[entry["filename"] for entry in entries],
+            pitch=[entry["pitch"] for entry in entries],
+            roll=[entry["roll"] for entry in entries],
+            yaw=[entry["yaw"] for entry in entries],
+            centroids=np.reshape([entry["centroid"] for entry in entries], (-1, 3)),
+            axes=np.reshape([entry["principal_axes"] for entry in entries], (-1, 3, 3)),
+            spine=spine,
+        )
+
+    @classmethod
+    def concatenate(cls, profiles):
+        """Stack several profiles (e.g. one per spine) into a single cohort profile."""
+        profiles = list(profiles)
+        if not profiles:
+            return cls([], [], [], [], np.empty((0, 3)), np.empty((0, 3, 3)))
+        return cls(**{field: np.concatenate([getattr(profile, field) for profile in profiles])
+                      for field in _FIELDS})
+
+    @property
+    def angles(self):
+        """(N, 3) array of pitch, roll and yaw."""
+        return np.stack([self.pitch, self.roll, self.yaw], axis=1)
+
+    def __len__(self):
+        return len(self.filenames)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self._entry(index)
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            return self._entry(index)
+        return VBCProfile(**{field: getattr(self, field)[index] for field in _FIELDS})
+
+    def __eq__(self, other):
+        if not isinstance(other, VBCProfile):
+            return NotImplemented
+        return all(np.array_equal(getattr(self, field), getattr(other, field)) for field in _FIELDS)
+
+    def __repr__(self):
+        return f"VBCProfile({len(self)} vertebrae)"
+
+    def _entry(self, index):
+        """Return row `index` in the dict layout of `process_stl_file`."""
+        return {
+            "filename": str(self.filenames[index]),
+            "pitch": self.pitch[index],
+            "roll": self.roll[index],
+            "yaw": self.yaw[index],
+            "centroid": self.centroids[index],
+            "principal_axes": self.axes[index]
+        }
+
+    def to_dict(self):
+        """Return the columns as a dict of numpy arrays (no copies)."""
+        return {field: getattr(self, field) for field in _FIELDS}
+
+    def to_dataframe(self):
+        """
+        Return a pandas DataFrame with one row per vertebra.
+
+        Scalar columns share memory with the profile where pandas allows it; the centroid
+        is split into `centroid_x/y/z` and the axes are left out (use `axes` directly).
+        """
+        try:
+            import pandas as pd
+        except ImportError as error:
+            raise ImportError("to_dataframe requires pandas: pip install pandas") from error
+        columns = {
+            "spine": self.spine,
+            "filename": self.filenames,
+            "level": self.levels,
+            "pitch": self.pitch,
+            "roll": self.roll,
+            "yaw": self.yaw,
+            "centroid_x": self.centroids[:, 0],
+            "centroid_y": self.centroids[:, 1],
+            "centroid_z": self.centroids[:, 2],
+        }
+        return pd.DataFrame(columns, copy=False)
+
+    def to_arrow(self):
+        """Return a pyarrow Table; the numeric columns wrap the profile arrays without copying."""
+        try:
+            import pyarrow as pa
+        except ImportError as error:
+            raise ImportError("to_arrow requires pyarrow: pip install pyarrow") from error
+        return pa.table({
+            "spine": pa.array(self.spine),
+            "filename": pa.array(self.filenames),
+            "level": pa.array(self.levels),
+            "pitch": pa.array(self.pitch),
+            "roll": pa.array(self.roll),
+            "yaw": pa.array(self.yaw),
+            "centroid": pa.FixedSizeListArray.from_arrays(pa.array(self.centroids.reshape(-1)), 3),
+            "axes": pa.FixedSizeListArray.from_arrays(pa.array(self.axes.reshape(-1)), 9),
+        })
+
+    @classmethod
+    def from_arrow(cls, table):
+        """Build a profile from a table written by `to_arrow`."""
+        n = table.num_rows
+
+        def column(name):
+            return table.column(name).combine_chunks()
+
+        return cls(
+            filenames=column("filename").to_numpy(zero_copy_only=False),
+            levels=column("level").to_numpy(zero_copy_only=False),
+            spine=column("spine").to_numpy(zero_copy_only=False),
+            pitch=column("pitch").to_numpy(),
+            roll=column("roll").to_numpy(),
+            yaw=column("yaw").to_numpy(),
+            centroids=column("centroid").flatten().to_numpy().reshape(n, 3),
+            axes=column("axes").flatten().to_numpy().reshape(n, 3, 3),
+        )
+
+    def save(self, path):
+        """
+        Save the profile to Parquet if the path ends in `.parquet`, else in `.npz` format.
+
+        The file is written to `path` exactly as given (no `.npz` is appended), so `load(path)`
+        always finds it.
+        """
+        path = os.fspath(path)
+        if path.endswith(".parquet"):
+            import pyarrow.parquet as pq
+            pq.write_table(self.to_arrow(), path)
+        else:
+            with open(path, "wb") as f:
+                np.savez(f, **self.to_dict())
+
+    @classmethod
+    def load(cls, path):
+        """Load a profile saved with `save`."""
+        path = os.fspath(path)
+        if path.endswith(".parquet"):
+            import pyarrow.parquet as pq
+            return cls.from_arrow(pq.read_table(path))
+        with np.load(path) as data:
+            return cls(**{field: data[field] for field in _FIELDS})
@@ -0,0 +1,237 @@
+import numpy as np
+
+from .analysis import principal_axes_from_covariances, normalize_angles
+from .decimation import voxel_cluster
+
+DEFAULT_MAX_POINTS = 20000
+# sqrt of the 97.5% quantile of the chi-square distribution with 3 degrees of freedom
+HUBER_THRESHOLD = 3.0575
+# Clouds larger than this multiple of the budget are first thinned by a uniform random draw
+PRETHIN_FACTOR = 8
+
+
+def _voxel_size(points, max_points):
+    """Initial voxel size for about `max_points` occupied voxels on the surface of the point cloud."""
+    extent = np.ptp(points, axis=0)
+    area = 2 * (extent[0] * extent[1] + extent[1] * extent[2] + extent[0] * extent[2])
+    return np.sqrt(area / max_points)
+
+
+def voxel_subsample(points, max_points, offset=0.0, voxel_size=None, max_iterations=8):
+    """
+    Reduce a point cloud to at most `max_points` voxel-grid cluster centers.
+
+    Every occupied voxel contributes one point, so dense and sparse regions of the
+    tessellation count equally. `offset` shifts the grid by a fraction of a voxel. If
+    `voxel_size` is not given it is searched for as in `downsample_points`.
+
+    Returns the cluster centers and the voxel size used, so further draws can reuse it.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    if voxel_size is None:
+        if len(points) <= max_points:
+            return points, 0.0
+        voxel_size = _voxel_size(points, max_points)
+        for _ in range(max_iterations):
+            _, centers = voxel_cluster(points, voxel_size, offset)
+            if len(centers) <= max_points:
+                break
+            voxel_size *= 1.05 * np.sqrt(len(centers) / max_points)
+        return centers, voxel_size
+    return voxel_cluster(points, voxel_size, offset)[1], voxel_size
+
+
+def stratified_subsample(points, max_points, seed=0, points_per_stratum=8):
+    """
+    Draw at most `max_points` points, stratified over a voxel grid.
+
+    The bounding volume is split into voxels holding about `points_per_stratum` of the
+    budget each, and every voxel receives a share of the budget proportional to its
+    number of points, drawn without replacement. Unlike `voxel_subsample` the returned
+    points are actual vertices and keep the density of the tessellation.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    if len(points) <= max_points:
+        return points
+    rng = np.random.default_rng(seed)
+    labels, _ = voxel_cluster(points, _voxel_size(points, max(max_points // points_per_stratum, 1)),
+                              rng.uniform(size=3))
+    counts = np.bincount(labels)
+    quota = np.ceil(counts * (max_points / len(points))).astype(np.int64)
+
+    # Rank the points of every stratum in random order and keep the first `quota` of each
+    order = np.lexsort((rng.random(len(points)), labels))
+    sorted_labels = labels[order]
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    rank = np.arange(len(points)) - starts[sorted_labels]
+    selected = order[rank < quota[sorted_labels]]
+    # Rounding the quotas up can overshoot the budget by up to one point per stratum
+    if len(selected) > max_points:
+        selected = rng.choice(selected, size=max_points, replace=False)
+    return points[np.sort(selected)]
+
+
+def subsample_to_budget(points, max_points=DEFAULT_MAX_POINTS, sampling='voxel', seed=0, voxel_size=None):
+    """
+    Reduce a point cloud to a fixed budget with 'voxel' or 'stratified' sampling.
+
+    `seed` 0 gives the reference draw; other seeds shift the voxel grid ('voxel') or
+    change the random draw ('stratified'). Returns the points and the voxel size ('voxel' only).
+    """
+    if sampling == 'voxel':
+        offset = 0.0 if seed == 0 else np.random.default_rng(seed).uniform(size=3)
+        return voxel_subsample(points, max_points, offset, voxel_size)
+    if sampling == 'stratified':
+        return stratified_subsample(points, max_points, seed), None
+    raise ValueError(f"Unknown sampling '{sampling}'. Use 'voxel' or 'stratified'.")
+
+
+def _mahalanobis_sq(centered, covariance):
+    """Squared Mahalanobis distance of each centered point."""
+    return np.einsum('ij,ij->i', centered @ np.linalg.pinv(covariance), centered)
+
+
+def trimmed_covariance(points, trim=0.1, iterations=5):
+    """
+    Centroid and covariance of the points without the `trim` fraction of outliers.
+
+    Starting from the full covariance, the points with the largest Mahalanobis distance are
+    dropped and the estimate is recomputed from the rest, `iterations` times or until the
+    retained set no longer changes (concentration steps of the minimum covariance determinant).
+
+    Returns the centroid, the covariance and the boolean mask of retained points.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    keep_count = max(int(np.ceil(len(points) * (1 - trim))), 4)
+    inliers = np.ones(len(points), dtype=bool)
+    for _ in range(iterations):
+        centroid = points[inliers].mean(axis=0)
+        covariance = np.cov(points[inliers].T)
+        distances = _mahalanobis_sq(points - centroid, covariance)
+        retained = np.zeros(len(points), dtype=bool)
+        retained[np.argpartition(distances, keep_count - 1)[:keep_count]] = True
+        if np.array_equal(retained, inliers):
+            break
+        inliers = retained
+    return points[inliers].mean(axis=0), np.cov(points[inliers].T), inliers
+
+
+def reweighted_covariance(points, threshold=HUBER_THRESHOLD, iterations=20, tolerance=1e-6):
+    """
+    Centroid and covariance by iteratively reweighted least squares with Huber weights.
+
+    Points within `threshold` Mahalanobis distance get weight 1, points further out
+    `threshold / distance`, so outliers are down-weighted smoothly instead of dropped.
+
+    Returns the centroid, the covariance and the final weight of each point.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    weights = np.ones(len(points))
+    for _ in range(iterations):
+        centroid = np.average(points, axis=0, weights=weights)
+        centered = points - centroid
+        covariance = np.cov(centered.T, aweights=weights)
+        distances = np.sqrt(_mahalanobis_sq(centered, covariance))
+        new_weights = np.minimum(1.0, threshold / np.maximum(distances, 1e-12))
+        converged = np.max(np.abs(new_weights - weights)) < tolerance
+        weights = new_weights
+        if converged:
+            break
+    centroid = np.average(points, axis=0, weights=weights)
+    return centroid, np.cov((points - centroid).T, aweights=weights), weights
+
+
+def robust_covariance(points, estimator=None, **options):
+    """
+    Centroid and covariance with the selected `estimator`.
+
+    None gives the plain covariance, 'trimmed' uses `trimmed_covariance` and 'irls'
+    `reweighted_covariance`; `options` are passed on to them.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    if estimator is None:
+        return points.mean(axis=0), np.cov(points.T)
+    if estimator == 'trimmed':
+        return trimmed_covariance(points, **options)[:2]
+    if estimator == 'irls':
+        return reweighted_covariance(points, **options)[:2]
+    raise ValueError(f"Unknown estimator '{estimator}'. Use None, 'trimmed' or 'irls'.")
+
+
+def vertebral_body_mask(points, anterior=(0.0, -1.0, 0.0), offset=0.0, centroid=None):
+    """
+    Boolean mask of the points belonging to the vertebral body.
+
+    A point is counted as vertebral body if it lies more than `offset` in front of the
+    centroid along the `anterior` direction; the rest are posterior elements (pedicles,
+    laminae, processes). The default anterior direction is -Y, which matches the bundled
+    CT segmentations and selects the same points as `centered_points[:, 1] < 0`.
+    """
+    points = np.asarray(points)
+    if centroid is None:
+        centroid = points.mean(axis=0)
+    anterior = np.asarray(anterior, dtype=np.float64)
+    return (points - centroid) @ (anterior / np.linalg.norm(anterior)) > offset
+
+
+def calculate_principal_axes_robust(points, max_points=DEFAULT_MAX_POINTS, sampling='voxel', estimator=None,
+                                    region=None, error_draws=8, estimator_options=None, region_options=None):
+    """
+    Calculate pitch, roll, yaw from a subsampled and optionally robust covariance.
+
+    The point cloud is reduced to a fixed budget first (after a uniform random thinning to
+    `PRETHIN_FACTOR` times the budget for very dense clouds), so the cost of the sampling,
+    the covariance and any robust estimator does not grow with the mesh resolution. The angular error of
+    the subsampling is estimated from `error_draws` further draws (shifted voxel grids or
+    new random draws), whose covariances are decomposed in one batched `eigh` call.
+
+    Parameters:
+    points : ndarray
+        (N, 3) vertices, e.g. from `load_stl_file()`.
+    max_points : int
+        Point budget. Default is 20000.
+    sampling : str
+        'voxel' for voxel-grid cluster centers or 'stratified' for a stratified random draw.
+    estimator : str
+        None, 'trimmed' or 'irls', see `robust_covariance`.
+    region : str
+        None for all points, 'body' or 'posterior' to keep one side of `vertebral_body_mask`.
+    error_draws : int
+        Number of extra draws for the error estimate; 0 disables it.
+    estimator_options, region_options : dict
+        Passed on to the estimator and to `vertebral_body_mask`.
+
+    Returns pitch, roll, yaw, centroid, principal axes and the (3,) estimated standard error
+    of pitch, roll and yaw in degrees (zeros if the cloud is within the budget).
+    """
+    points = np.asarray(points, dtype=np.float64)
+    if region is not None:
+        mask = vertebral_body_mask(points, **(region_options or {}))
+        if region == 'posterior':
+            mask = ~mask
+        elif region != 'body':
+            raise ValueError(f"Unknown region '{region}'. Use None, 'body' or 'posterior'.")
+        points = points[mask]
+
+    subsampled = len(points) > max_points
+    if len(points) > PRETHIN_FACTOR * max_points:
+        # Drawing k of N indices costs O(k), which keeps the rest independent of N
+        index = np.random.default_rng(0).choice(len(points), size=PRETHIN_FACTOR * max_points, replace=False)
+        points = points[np.sort(index)]
+    draws = 1 + (error_draws if subsampled else 0)
+    sample, voxel_size = subsample_to_budget(points, max_points, sampling)
+    moments = [robust_covariance(sample, estimator, **(estimator_options or {}))]
+    for seed in range(1, draws):
+        sample = subsample_to_budget(points, max_points, sampling, seed, voxel_size)[0]
+        moments.append(robust_covariance(sample, estimator, **(estimator_options or {})))
+
+    covariances = np.stack([covariance for _, covariance in moments])
+    pitch, roll, yaw, axes = principal_axes_from_covariances(covariances)
+    angles = np.stack([pitch, roll, yaw], axis=1)
+    if draws > 1:
+        # Every draw differs from the reference by two independent sampling errors
+        deviations = normalize_angles(angles[1:] - angles[0])
+        angular_error = np.sqrt(np.mean(deviations ** 2, axis=0) / 2)
+    else:
+        angular_error = np.zeros(3)
+    return pitch[0], roll[0], yaw[0], moments[0][0], axes[0], angular_error
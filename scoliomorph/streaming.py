@@ -0,0 +1,85 @@
+import os
+import mmap
+import numpy as np
+
+from .analysis import load_stl_triangles, principal_axes_from_covariance
+from .moments import MomentAccumulator, DEFAULT_CHUNK_SIZE
+
+# Binary STL layout: 80 byte header, uint32 triangle count, then 50 byte records
+STL_HEADER_SIZE = 84
+STL_RECORD_DTYPE = np.dtype([
+    ("normal", "<f4", (3,)),
+    ("vectors", "<f4", (3, 3)),
+    ("attr", "<u2"),
+])
+
+
+def is_binary_stl(filepath):
+    """Return True if the file size matches the triangle count of a binary STL header."""
+    size = os.path.getsize(filepath)
+    if size < STL_HEADER_SIZE:
+        return False
+    with open(filepath, "rb") as f:
+        f.seek(80)
+        n_triangles = int(np.frombuffer(f.read(4), dtype="<u4")[0])
+    return size == STL_HEADER_SIZE + n_triangles * STL_RECORD_DTYPE.itemsize
+
+
+def iter_stl_chunks(filepath, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Yield the triangles of an STL file as (M, 3, 3) float32 arrays of at most `chunk_size` triangles.
+
+    Binary files are memory-mapped and the pages of each chunk are released once it has been
+    copied out, so the resident memory stays bounded by the chunk size, not the file size.
+    ASCII files cannot be mapped and are loaded eagerly, then yielded in chunks.
+    """
+    if not is_binary_stl(filepath):
+        triangles = load_stl_triangles(filepath)
+        for start in range(0, len(triangles), chunk_size):
+            yield triangles[start:start + chunk_size]
+        return
+
+    with open(filepath, "rb") as f:
+        n_triangles = (os.path.getsize(filepath) - STL_HEADER_SIZE) // STL_RECORD_DTYPE.itemsize
+        if n_triangles == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for start in range(0, n_triangles, chunk_size):
+                count = min(chunk_size, n_triangles - start)
+                offset = STL_HEADER_SIZE + start * STL_RECORD_DTYPE.itemsize
+                records = np.frombuffer(mm, dtype=STL_RECORD_DTYPE, count=count, offset=offset)
+                chunk = records["vectors"].copy()
+                del records
+
+                # Drop the mapped pages we are done with
+                if hasattr(mm, "madvise") and hasattr(mmap, "MADV_DONTNEED"):
+                    page_start = offset - offset % mmap.PAGESIZE
+                    mm.madvise(mmap.MADV_DONTNEED, page_start, offset + count * STL_RECORD_DTYPE.itemsize - page_start)
+                yield chunk
+
+
+def stream_mesh_moments(filepath, weighting='points', chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Compute the centroid and covariance of an STL file chunk by chunk in bounded memory.
+
+    `weighting` is 'points' (triangle soup, as `load_stl_file`), 'area' or 'volume',
+    see `MomentAccumulator`.
+    """
+    accumulator = MomentAccumulator(weighting)
+    for chunk in iter_stl_chunks(filepath, chunk_size):
+        accumulator.add(chunk)
+    return accumulator.result()
+
+
+def calculate_principal_axes_streaming(filepath, method='points', chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Calculate pitch, roll, yaw of an STL file without loading the whole mesh into memory.
+
+    With method='points' the result matches `calculate_principal_axes(load_stl_file(filepath))`
+    to floating-point tolerance; 'area' and 'volume' match `calculate_principal_axes_from_mesh`.
+
+    Returns pitch, roll, yaw, centroid and the sorted principal axes.
+    """
+    centroid, covariance = stream_mesh_moments(filepath, method, chunk_size)
+    pitch, roll, yaw, principal_axes = principal_axes_from_covariance(covariance)
+    return pitch, roll, yaw, centroid, principal_axes
@@ -0,0 +1,117 @@
+import numpy as np
+
+from .analysis import principal_axes_from_covariance, principal_axes_from_covariances, normalize_angles, unique_points
+
+DEFAULT_RESAMPLES = 1000
+# Upper bound on the elements of the (chunk, N) index and count arrays held at once
+MAX_CHUNK_ELEMENTS = 1 << 21
+
+
+def bootstrap_covariances(points, n_resamples=DEFAULT_RESAMPLES, chunk_size=None, seed=0):
+    """
+    Centroids and covariances of `n_resamples` bootstrap resamples of a point cloud.
+
+    Each chunk of resamples is drawn as one (chunk, N) index array and turned into
+    per-point counts, so the first and second moments of all resamples in the chunk are
+    one batched einsum product with the points and their outer products, without
+    materialising the resampled clouds.
+
+    Parameters:
+    points : ndarray
+        (N, 3) vertices.
+    n_resamples : int
+        Number of bootstrap resamples B. Default is 1000.
+    chunk_size : int
+        Number of resamples handled at once, which bounds memory to about
+        24 * chunk_size * N bytes. Default keeps chunk_size * N below 2**21 (about 50 MB).
+    seed : int
+        Seed of the random generator, for reproducible intervals.
+
+    Returns (B, 3) centroids and (B, 3, 3) covariances.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    n = len(points)
+    if chunk_size is None:
+        chunk_size = max(MAX_CHUNK_ELEMENTS // max(n, 1), 1)
+    rng = np.random.default_rng(seed)
+
+    # Center first so the one-pass second moments do not lose precision
+    origin = points.mean(axis=0)
+    centered = points - origin
+    # Per-point first and second moments; one product with the counts gives both
+    features = np.concatenate([centered, np.einsum('ni,nj->nij', centered, centered).reshape(n, 9)], axis=1)
+
+    centroids = np.empty((n_resamples, 3))
+    covariances = np.empty((n_resamples, 3, 3))
+    for start in range(0, n_resamples, chunk_size):
+        size = min(chunk_size, n_resamples - start)
+        index = rng.integers(0, n, size=(size, n))
+        # Offset every row so one bincount gives the (size, N) count matrix
+        index += np.arange(size)[:, None] * n
+        counts = np.bincount(index.ravel(), minlength=size * n).reshape(size, n).astype(np.float64)
+        del index
+        moments = np.einsum('bn,nk->bk', counts, features, optimize=True) / n
+        mean, second = moments[:, :3], moments[:, 3:].reshape(size, 3, 3)
+        covariances[start:start + size] = (second - np.einsum('bi,bj->bij', mean, mean)) * (n / (n - 1))
+        centroids[start:start + size] = mean + origin
+    return centroids, covariances
+
+
+def bootstrap_principal_axes(points, n_resamples=DEFAULT_RESAMPLES, confidence=0.95, chunk_size=None, seed=0,
+                             return_samples=False, deduplicate=True):
+    """
+    Calculate pitch, roll, yaw with bootstrap percentile confidence intervals.
+
+    The covariances of all resamples (`bootstrap_covariances`) are decomposed in one
+    stacked `eigh` call, with the axis signs anchored to the full-cloud axes so that a
+    resample cannot flip an axis. Deviations from the point estimate are wrapped to
+    [-90°, 90°] before taking percentiles, so intervals across the ±90° boundary stay valid.
+
+    The cost grows linearly with the number of points: 1000 resamples take about 0.15 s
+    for 20,000 points but over a second for 100,000. By default repeated points are
+    merged first, so the triangle soup of `load_stl_file()` (every vertex about six times)
+    is resampled as its distinct vertices, which are the independent surface samples.
+
+    Parameters:
+    points : ndarray
+        (N, 3) vertices, e.g. from `load_stl_file()` or a budget-reduced cloud from
+        `scoliomorph.robust.subsample_to_budget()`.
+    n_resamples : int
+        Number of bootstrap resamples. Default is 1000.
+    confidence : float
+        Coverage of the two-sided percentile intervals. Default is 0.95.
+    chunk_size, seed :
+        As for `bootstrap_covariances`.
+    return_samples : bool
+        Also return the (B, 3) resampled pitch, roll, yaw as 'samples'.
+    deduplicate : bool
+        Merge bit-identical points before resampling (the angles are then those of
+        `mode='unique'`). Default is True; False resamples the rows as given.
+
+    Returns a dict with 'angles' (3,) pitch, roll, yaw of the full cloud, 'ci' (3, 2) lower
+    and upper bounds, 'std' (3,) bootstrap standard errors in degrees, 'centroid' and
+    'principal_axes'.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    if deduplicate:
+        points = unique_points(points)[0]
+    centroid = points.mean(axis=0)
+    pitch, roll, yaw, principal_axes = principal_axes_from_covariance(np.cov((points - centroid).T))
+    angles = np.array([pitch, roll, yaw])
+
+    _, covariances = bootstrap_covariances(points, n_resamples, chunk_size, seed)
+    samples = np.stack(principal_axes_from_covariances(covariances, reference=principal_axes)[:3], axis=1)
+    deviations = normalize_angles(samples - angles)
+    tail = (1 - confidence) / 2 * 100
+    bounds = np.percentile(deviations, [tail, 100 - tail], axis=0).T
+
+    result = {
+        "angles": angles,
+        "ci": angles[:, None] + bounds,
+        "std": deviations.std(axis=0, ddof=1),
+        "centroid": centroid,
+        "principal_axes": principal_axes,
+    }
+    if return_samples:
+        result["samples"] = angles + deviations
+    return result
@@ -0,0 +1,183 @@
+import os
+import numpy as np
+
+from .analysis import list_stl_files, load_stl_triangles, deduplicate_vertices
+
+# Bump whenever the metrics of mesh_quality change; invalidates cached metrics
+QUALITY_VERSION = 1
+
+DEFAULT_THRESHOLDS = {
+    "min_faces": 500,
+    "max_degenerate_fraction": 0.01,
+    "max_duplicate_fraction": 0.01,
+    "min_largest_component_fraction": 0.99,
+    "min_extent": 5.0,
+    "max_extent": 150.0,
+}
+
+
+def _find_roots(parent):
+    """Follow parent pointers until every vertex points at its root (pointer jumping)."""
+    while True:
+        grandparent = parent[parent]
+        if np.array_equal(grandparent, parent):
+            return parent
+        parent = grandparent
+
+
+def connected_components(faces, n_vertices):
+    """
+    Label the connected components of a mesh; faces sharing a vertex are connected.
+
+    Vectorized union-find: every edge hooks the larger of its two roots onto the smaller
+    (`np.minimum.at`), then all paths are compressed by pointer jumping, until no edge
+    joins two different roots. Returns the component label of every vertex (0 .. C-1,
+    ordered by smallest vertex index) and the number of components C.
+    """
+    faces = np.asarray(faces)
+    parent = np.arange(n_vertices)
+    u = faces[:, [0, 1]].ravel()
+    v = faces[:, [1, 2]].ravel()
+    while True:
+        parent = _find_roots(parent)
+        root_u, root_v = parent[u], parent[v]
+        differ = root_u != root_v
+        if not differ.any():
+            break
+        np.minimum.at(parent, np.maximum(root_u[differ], root_v[differ]), np.minimum(root_u[differ], root_v[differ]))
+    roots, labels = np.unique(parent, return_inverse=True)
+    return labels.ravel(), len(roots)
+
+
+def _row_keys(rows, n_vertices):
+    """One int64 per row of sorted vertex indices, so rows can be compared with a 1-D `np.unique`."""
+    rows = np.sort(rows, axis=1).astype(np.int64)
+    if n_vertices ** rows.shape[1] >= 2 ** 63:
+        # Too many vertices to pack the row into one integer; view it as a single void item instead
+        rows = np.ascontiguousarray(rows)
+        return rows.view(np.dtype((np.void, rows.dtype.itemsize * rows.shape[1]))).ravel()
+    keys = rows[:, 0]
+    for column in range(1, rows.shape[1]):
+        keys = keys * n_vertices + rows[:, column]
+    return keys
+
+
+def _edge_counts(faces, n_vertices):
+    """Number of faces at every undirected edge of the mesh."""
+    edges = np.concatenate([faces[:, [0, 1]], faces[:, [1, 2]], faces[:, [2, 0]]])
+    return np.unique(_row_keys(edges, n_vertices), return_counts=True)[1]
+
+
+def mesh_quality(triangles, degenerate_tolerance=1e-6):
+    """
+    Quality metrics of an (M, 3, 3) triangle mesh, as loaded by `load_stl_triangles`.
+
+    Returns a JSON-serializable dict with 'face_count', 'vertex_count', 'surface_area',
+    'degenerate_fraction' (faces with an area below `degenerate_tolerance` times the mean
+    area), 'duplicate_fraction' (faces repeating another face's vertices, e.g. a duplicated
+    shell), 'components' and 'largest_component_fraction' (share of faces in the largest
+    connected component), 'open_edges' and 'non_manifold_edges' (edges with one or more
+    than two faces; a watertight mesh has neither) and the bounding box 'extent' in mm.
+    """
+    triangles = np.asarray(triangles)
+    vertices, faces, _ = deduplicate_vertices(triangles.reshape(-1, 3))
+    corners = triangles.astype(np.float64)
+    areas = 0.5 * np.linalg.norm(np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0]), axis=1)
+    face_count = len(faces)
+
+    if face_count:
+        degenerate = areas <= degenerate_tolerance * areas.mean()
+        duplicates = face_count - len(np.unique(_row_keys(faces, len(vertices))))
+        labels, components = connected_components(faces, len(vertices))
+        largest = np.bincount(labels[faces[:, 0]], minlength=components).max()
+        edge_counts = _edge_counts(faces, len(vertices))
+        extent = np.ptp(vertices, axis=0).astype(np.float64)
+    else:
+        degenerate, duplicates, components, largest = np.zeros(0, dtype=bool), 0, 0, 0
+        edge_counts, extent = np.zeros(0, dtype=int), np.zeros(3)
+
+    return {
+        "face_count": int(face_count),
+        "vertex_count": int(len(vertices)),
+        "surface_area": float(areas.sum()),
+        "degenerate_fraction": float(degenerate.mean()) if face_count else 0.0,
+        "duplicate_fraction": float(duplicates / face_count) if face_count else 0.0,
+        "components": int(components),
+        "largest_component_fraction": float(largest / face_count) if face_count else 0.0,
+        "open_edges": int(np.count_nonzero(edge_counts == 1)),
+        "non_manifold_edges": int(np.count_nonzero(edge_counts > 2)),
+        "extent": extent.tolist(),
+    }
+
+
+def quality_issues(metrics, **thresholds):
+    """
+    List the problems found in `mesh_quality` metrics, empty if the mesh passes.
+
+    `thresholds` override `DEFAULT_THRESHOLDS` ('min_faces', 'max_degenerate_fraction',
+    'max_duplicate_fraction', 'min_largest_component_fraction', 'min_extent', 'max_extent';
+    None disables a check). Small loose fragments, common in segmentations, pass as long as
+    the largest component holds nearly all faces.
+    """
+    limits = dict(DEFAULT_THRESHOLDS, **thresholds)
+    checks = (
+        ("min_faces", metrics["face_count"] < (limits["min_faces"] or 0),
+         f"only {metrics['face_count']} faces"),
+        ("max_degenerate_fraction", metrics["degenerate_fraction"] > (limits["max_degenerate_fraction"] or 0),
+         f"{100 * metrics['degenerate_fraction']:.1f}% degenerate faces"),
+        ("max_duplicate_fraction", metrics["duplicate_fraction"] > (limits["max_duplicate_fraction"] or 0),
+         f"{100 * metrics['duplicate_fraction']:.1f}% duplicated faces"),
+        ("min_largest_component_fraction",
+         metrics["largest_component_fraction"] < (limits["min_largest_component_fraction"] or 0),
+         f"largest of {metrics['components']} components has only "
+         f"{100 * metrics['largest_component_fraction']:.1f}% of the faces"),
+        ("min_extent", min(metrics["extent"]) < (limits["min_extent"] or 0),
+         f"bounding box {metrics['extent']} smaller than {limits['min_extent']} mm"),
+        ("max_extent", max(metrics["extent"]) > (limits["max_extent"] or np.inf),
+         f"bounding box {metrics['extent']} larger than {limits['max_extent']} mm"),
+    )
+    return [message for name, failed, message in checks if limits[name] is not None and failed]
+
+
+def largest_component(triangles):
+    """Return only the triangles of the largest connected component (by face count)."""
+    triangles = np.asarray(triangles)
+    vertices, faces, _ = deduplicate_vertices(triangles.reshape(-1, 3))
+    if not len(faces):
+        return triangles
+    labels, components = connected_components(faces, len(vertices))
+    if components == 1:
+        return triangles
+    face_labels = labels[faces[:, 0]]
+    return triangles[face_labels == np.argmax(np.bincount(face_labels))]
+
+
+def validate_spine(folder_path, cache=None, **thresholds):
+    """
+    Pre-flight check of every STL file in a spine folder, to run ahead of `calculate_vbc_profile`.
+
+    With an `OrientationCache`, metrics are stored next to the orientation results under
+    the file's content hash, so re-checking unchanged files does not read them again.
+
+    `thresholds` are passed to `quality_issues`. Spines that will be processed with
+    `component='largest'` should be checked with `min_largest_component_fraction=None`, as
+    that option removes the loose fragments this check rejects.
+
+    Returns a dict {filename: {'metrics': ..., 'issues': [...]}}; files with issues should be
+    fixed, excluded or processed with `component='largest'`.
+    """
+    report = {}
+    for filename in list_stl_files(folder_path):
+        filepath = os.path.join(folder_path, filename)
+        metrics = cache.get_quality(filepath, QUALITY_VERSION) if cache is not None else None
+        if metrics is None:
+            metrics = mesh_quality(load_stl_triangles(filepath))
+            if cache is not None:
+                cache.put_quality(filepath, metrics, QUALITY_VERSION)
+        report[filename] = {"metrics": metrics, "issues": quality_issues(metrics, **thresholds)}
+    return report
+
+
+def rejected_files(report):
+    """File names with at least one issue in a `validate_spine` report."""
+    return [filename for filename, item in report.items() if item["issues"]]
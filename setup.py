@@ -11,6 +11,14 @@ setup(
         "trimesh",
         # 'tkinter' - Optional; already included in Python installations
     ],
+    extras_require={
+        "pandas": ["pandas"],
+        "parquet": ["pyarrow"],
+        "registration": ["scipy"],
+    },
+    entry_points={
+        "console_scripts": ["scoliomorph=scoliomorph.cli:main"],
+    },
     description="Library for the Vertebral Body Rotation analysis from STL point cloud including pitch, roll, and yaw calculations",
     author="Ravi Umadi",
     author_email="ravisumadi@gmail.com",